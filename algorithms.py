@@ -1,271 +1,759 @@
 import heapq
+import math
 import random
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+from frontier_bfs import iter_levels, path_from_distance
+from grid_graph import DIRECTIONS, grid_graph
+from dstar_lite import dstar_planner
+from grid_model import as_grid_model
+from hpa import DEFAULT_CLUSTER_SIZE, cluster_hierarchy
+from instrumentation import recorded_phase, search_counters
+from priority_queue import BINARY_HEAP, make_queue
+from q_learning import QLearningEngine, remember_table, warm_start_engine
+
+# Step events yielded by the ``*_events`` generators as ``(kind, cell_id)``
+# pairs, where ``cell_id`` is the flat index ``i * cols + j``.
+VISIT = 0  # cell added to the visit trace (what the animator draws)
+PUSH = 1   # cell entered the frontier without being drawn yet
+PATH = 2   # cell of the final path, emitted start to goal once the search ends
 
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def bfs_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    queue = [start]
-    visited = {start}
-    steps = [start]
+def octile(a, b):
+    di, dj = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(di, dj) + (math.sqrt(2) - 1) * min(di, dj)
+
+def euclidean(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+# Distance estimates selectable by name; Manhattan is only admissible under
+# 4-connectivity, octile and Euclidean under both.
+HEURISTICS = {
+    "manhattan": heuristic,
+    "octile": octile,
+    "euclidean": euclidean,
+}
+
+def goal_heuristic(graph, goal, name=None):
+    """Return ``h(node)`` estimating the cost from a flat id to ``goal``.
+
+    ``name`` picks from HEURISTICS and defaults to the one matching the
+    graph's connectivity; estimates are scaled by the cheapest cell cost so
+    they stay admissible on weighted grids.
+    """
+    name = name or ("manhattan" if graph.connectivity == 4 else "octile")
+    function = HEURISTICS[name]
+    scale = graph.min_cost
+    cols = graph.cols
+    goal_i, goal_j = goal
+    if name == "manhattan" and scale == 1:
+        def h(node):
+            i, j = divmod(node, cols)
+            return abs(i - goal_i) + abs(j - goal_j)
+    else:
+        def h(node):
+            return scale * function(divmod(node, cols), goal)
+    return h
+
+# Order among open cells with equal priority: first or last pushed first
+FIFO = "fifo"
+LIFO = "lifo"
+TIE_BREAKS = (FIFO, LIFO)
+
+def _tie_order(tie_break):
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"Unknown tie-breaking rule: {tie_break}")
+    return 1 if tie_break == FIFO else -1
+
+def path_cost(grid, path):
+    """Total cost of walking ``path``: each entered cell's cost, times
+    sqrt(2) for diagonal steps."""
+    grid = as_grid_model(grid)
+    total = 0.0
+    for (ai, aj), (bi, bj) in zip(path, path[1:]):
+        step = grid.cost(bi, bj)
+        total += step * math.sqrt(2) if ai != bi and aj != bj else step
+    return total
+
+def collect(events, cols, cancel=None, on_steps=None, chunk_size=256, stats=None):
+    """Drain an event stream into ``(steps, path)`` lists of ``(i, j)`` cells.
+
+    ``cancel`` is checked between events. When ``on_steps`` is given, new
+    steps are also handed to it in chunks while the search is running.
+    With an instrumentation.RunStats as ``stats`` the search records its
+    counters there. Up to the first path event the time goes to the
+    "search" phase, except what the search itself records as "path
+    reconstruction" (tracing predecessors); the rest is added to the latter.
+    """
+    steps = []
+    path = []
+    flushed = 0
+    path_started = None
+    reconstructed = stats.phases.get("path reconstruction", 0.0) if stats is not None else 0.0
+    with stats.recording() if stats is not None else nullcontext():
+        started = time.perf_counter()
+        for kind, node in events:
+            if cancel is not None and cancel.cancelled:
+                events.close()
+                cancel.check()
+            if kind == VISIT:
+                steps.append(divmod(node, cols))
+                if on_steps is not None and len(steps) - flushed >= chunk_size:
+                    on_steps(steps[flushed:])
+                    flushed = len(steps)
+            elif kind == PATH:
+                if path_started is None:
+                    path_started = time.perf_counter()
+                path.append(divmod(node, cols))
+        finished = time.perf_counter()
+    if on_steps is not None and len(steps) > flushed:
+        on_steps(steps[flushed:])
+    if stats is not None:
+        path_started = path_started or finished
+        traced = stats.phases.get("path reconstruction", 0.0) - reconstructed
+        stats.add_phase("search", path_started - started - traced)
+        stats.add_phase("path reconstruction", finished - path_started)
+    return steps, path
+
+def predecessors(size):
+    """Flat ``int32`` predecessor array for ``size`` cells, ``-1`` meaning
+    none, as a view that is cheap to index from Python loops."""
+    return memoryview(np.full(size, -1, dtype=np.int32))
+
+def trace_path(parents, node):
+    """Flat-id path from the root of ``parents`` to ``node``."""
+    path = []
+    with recorded_phase("path reconstruction"):
+        while node >= 0:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+    return path
+
+def _path_events(parents, node):
+    for cell in trace_path(parents, node):
+        yield PATH, cell
+
+def bfs_events(grid, start, goal):
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    source = graph.index(start)
+    target = graph.index(goal)
+    queue = deque([source])
+    visited = bytearray(graph.size)
+    visited[source] = 1
+    parents = predecessors(graph.size)
+    counters = search_counters()
+    yield VISIT, source
     while queue:
-        current = queue.pop(0)
-        if current == goal:
+        counters.frontier(len(queue))
+        current = queue.popleft()
+        if current == target:
+            yield from _path_events(parents, target)
             break
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(neighbor)
-                    steps.append(neighbor)
-    return steps
-
-def dfs_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    stack = [start]
-    visited = {start}
-    steps = [start]
+        counters.expanded += 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                queue.append(neighbor)
+                counters.generated += 1
+                yield VISIT, neighbor
+
+def frontier_bfs_events(grid, start, goal):
+    """BFS that expands a whole depth level per vectorized step.
+
+    Steps come out level by level (row-major within a level); the path is
+    read back from the distance field.
+    """
+    grid = as_grid_model(grid)
+    distance = None
+    counters = search_counters()
+    for level, distance in iter_levels(grid, start, goal):
+        counters.expanded = counters.generated  # every earlier level grew this one
+        counters.generated += len(level)
+        counters.frontier(len(level))
+        for node in level.tolist():
+            yield VISIT, node
+    for i, j in path_from_distance(grid, distance, goal):
+        yield PATH, i * grid.cols + j
+
+def dfs_events(grid, start, goal):
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    source = graph.index(start)
+    target = graph.index(goal)
+    stack = [source]
+    visited = bytearray(graph.size)
+    visited[source] = 1
+    parents = predecessors(graph.size)
+    counters = search_counters()
+    yield VISIT, source
     while stack:
+        counters.frontier(len(stack))
         current = stack.pop()
-        if current == goal:
+        if current == target:
+            yield from _path_events(parents, target)
             break
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    stack.append(neighbor)
-                    steps.append(neighbor)
-    return steps
-
-def astar_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, goal)}
-    came_from = {start: None}
-    steps = []
-    
+        counters.expanded += 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                stack.append(neighbor)
+                counters.generated += 1
+                yield VISIT, neighbor
+
+def astar_events(grid, start, goal, heuristic=None, queue=BINARY_HEAP):
+    """A* over edge costs; ``queue`` names the priority_queue backend, which
+    hands out each cell once unless a cheaper route reopens it."""
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    weights = graph.edge_weights()
+    h = goal_heuristic(graph, goal, heuristic)
+    source = graph.index(start)
+    target = graph.index(goal)
+    open_set = make_queue(queue, graph.size)
+    open_set.push(source, h(source))
+    g_score = memoryview(np.full(graph.size, np.inf))
+    g_score[source] = 0.0
+    parents = predecessors(graph.size)
+    counters = search_counters(open_set)
+
+    while open_set:
+        current = open_set.pop()[1]
+        yield VISIT, current
+
+        if current == target:
+            yield from _path_events(parents, target)
+            return
+
+        counters.expanded += 1
+
+        g = g_score[current]
+        for edge in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[edge]
+            tentative_g = g + weights[edge]
+            if tentative_g < g_score[neighbor]:
+                parents[neighbor] = current
+                g_score[neighbor] = tentative_g
+                open_set.push(neighbor, tentative_g + h(neighbor))
+                counters.generated += 1
+                yield PUSH, neighbor
+
+def jps_events(grid, start, goal):
+    """Jump Point Search for the 4-connected uniform-cost grid.
+
+    Canonical paths move horizontally first: a horizontal jump stops where a
+    vertical scan from the current cell finds a jump point, and a vertical
+    jump stops at the goal or where a side cell opens up that was blocked
+    one cell back (a forced neighbour). Only jump points are expanded, so
+    they make up the steps; the path is filled in cell by cell. Weighted or
+    8-connected grids have no such symmetry to prune, so they run A*.
+    """
+    grid = as_grid_model(grid)
+    if not grid_graph(grid).uniform:
+        yield from astar_events(grid, start, goal)
+        return
+    walls = grid.flat_walls()
+    rows, cols = grid.rows, grid.cols
+    goal_i, goal_j = goal
+    source = grid.index(*start)
+    target = grid.index(goal_i, goal_j)
+
+    def free(i, j):
+        return 0 <= i < rows and 0 <= j < cols and not walls[i * cols + j]
+
+    def jump_vertical(i, j, di):
+        while True:
+            ni = i + di
+            if not free(ni, j):
+                return None
+            if ni == goal_i and j == goal_j:
+                return ni
+            if (free(ni, j - 1) and not free(i, j - 1)) or (free(ni, j + 1) and not free(i, j + 1)):
+                return ni
+            i = ni
+
+    def jump_horizontal(i, j, dj):
+        while True:
+            nj = j + dj
+            if not free(i, nj):
+                return None
+            if (i == goal_i and nj == goal_j) or jump_vertical(i, nj, -1) is not None \
+                    or jump_vertical(i, nj, 1) is not None:
+                return nj
+            j = nj
+
+    def directions(i, j, direction):
+        if direction is None:
+            return DIRECTIONS
+        di, dj = direction
+        if di == 0:
+            return ((0, dj), (-1, 0), (1, 0))
+        forced = [(di, 0)]
+        for side in (-1, 1):
+            if free(i, j + side) and not free(i - di, j + side):
+                forced.append((0, side))
+        return forced
+
+    open_set = [(heuristic(start, goal), source)]
+    g_score = memoryview(np.full(grid.size, np.inf))
+    g_score[source] = 0.0
+    parents = predecessors(grid.size)
+    arrived = {source: None}  # direction of the jump that reached each node
+    closed = bytearray(grid.size)
+    counters = search_counters()
+    counters.heap_pushes = 1
+
     while open_set:
+        counters.frontier(len(open_set))
         current = heapq.heappop(open_set)[1]
-        steps.append(current)
-        
-        if current == goal:
-            # Reconstruct path
-            path = []
-            while current is not None:
-                path.append(current)
-                current = came_from[current]
-            path.reverse()
-            return steps, path
-            
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
+        counters.heap_pops += 1
+        if closed[current]:
+            counters.stale_pops += 1
+            continue
+        closed[current] = 1
+        yield VISIT, current
+
+        if current == target:
+            jump_points = trace_path(parents, current)
+            yield PATH, jump_points[0]
+            for a, b in zip(jump_points, jump_points[1:]):
+                stride = 1 if abs(b - a) < cols else cols
+                stride = stride if b > a else -stride
+                for node in range(a + stride, b + stride, stride):
+                    yield PATH, node
+            return
+
+        counters.expanded += 1
+        i, j = divmod(current, cols)
+        for di, dj in directions(i, j, arrived[current]):
+            if di:
+                ni, nj = jump_vertical(i, j, di), j
+                if ni is None:
                     continue
-                    
-                tentative_g = g_score[current] + 1
-                
-                if tentative_g < g_score.get(neighbor, float('inf')):
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-    
-    return steps, []  # No path found
-
-def dijkstra_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    g_score = {start: 0}
-    steps = []
+            else:
+                ni, nj = i, jump_horizontal(i, j, dj)
+                if nj is None:
+                    continue
+            neighbor = ni * cols + nj
+            tentative_g = g_score[current] + abs(ni - i) + abs(nj - j)
+            if tentative_g < g_score[neighbor]:
+                parents[neighbor] = current
+                g_score[neighbor] = tentative_g
+                arrived[neighbor] = (di, dj)
+                heapq.heappush(open_set, (tentative_g + abs(ni - goal_i) + abs(nj - goal_j), neighbor))
+                counters.heap_pushes += 1
+                counters.generated += 1
+                yield PUSH, neighbor
+
+def hpa_events(grid, start, goal, cluster_size=DEFAULT_CLUSTER_SIZE):
+    """HPA*: search the cached cluster abstraction, then refine the corridor.
+
+    Steps are the abstract nodes expanded; the path is near-optimal and
+    refined to every cell. The abstraction is reused across queries and only
+    clusters edited since the last query are rebuilt.
+    """
+    grid = as_grid_model(grid)
+    hierarchy = cluster_hierarchy(grid, cluster_size)
+    expanded, path = hierarchy.find_path(start, goal, goal_heuristic(grid_graph(grid), goal))
+    search_counters().expanded = len(expanded)
+    for node in expanded:
+        yield VISIT, node
+    for node in path:
+        yield PATH, node
+
+def dstar_lite_events(grid, start, goal):
+    """D* Lite: replans incrementally from the search state kept for the grid.
+
+    The first run to a goal is a full search; after cell edits (or a new
+    start) only the vertices affected are expanded again, and those make up
+    the steps. Changing the goal starts over.
+    """
+    grid = as_grid_model(grid)
+    planner = dstar_planner(grid, goal)
+    expanded, path = planner.plan(grid, start, goal_heuristic)
+    search_counters().expanded = len(expanded)
+    for node in expanded:
+        yield VISIT, node
+    for node in path:
+        yield PATH, node
+
+def dijkstra_events(grid, start, goal, queue=BINARY_HEAP):
+    """Dijkstra over edge costs; ``queue`` names the priority_queue backend,
+    so each cell is expanded once."""
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    weights = graph.edge_weights()
+    source = graph.index(start)
+    target = graph.index(goal)
+    open_set = make_queue(queue, graph.size)
+    open_set.push(source, 0.0)
+    g_score = memoryview(np.full(graph.size, np.inf))
+    g_score[source] = 0.0
+    parents = predecessors(graph.size)
+    counters = search_counters(open_set)
     while open_set:
-        current = heapq.heappop(open_set)[1]
-        steps.append(current)
-        if current == goal:
+        current = open_set.pop()[1]
+        yield VISIT, current
+        if current == target:
+            yield from _path_events(parents, target)
             break
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                tentative_g = g_score[current] + 1
-                if tentative_g < g_score.get(neighbor, float('inf')):
-                    g_score[neighbor] = tentative_g
-                    heapq.heappush(open_set, (tentative_g, neighbor))
-    return steps
-
-def beam_search(grid, start, goal, beam_width=3):
-    rows = len(grid)
-    cols = len(grid[0])
-    current_nodes = [start]
-    visited = {start}
-    steps = [start]
+        counters.expanded += 1
+        g = g_score[current]
+        for edge in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[edge]
+            tentative_g = g + weights[edge]
+            if tentative_g < g_score[neighbor]:
+                parents[neighbor] = current
+                g_score[neighbor] = tentative_g
+                open_set.push(neighbor, tentative_g)
+                counters.generated += 1
+                yield PUSH, neighbor
+
+def beam_events(grid, start, goal, beam_width=3, heuristic=None, tie_break=FIFO):
+    """Breadth-first layers cut down to the ``beam_width`` cells closest to
+    the goal, picked with a heap bounded by the width (heapq.nsmallest)."""
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    distance = goal_heuristic(graph, goal, heuristic)
+    _tie_order(tie_break)
+    source = graph.index(start)
+    target = graph.index(goal)
+
+    current_nodes = [source]
+    visited = bytearray(graph.size)
+    visited[source] = 1
+    parents = predecessors(graph.size)
+    counters = search_counters()
+    yield VISIT, source
     while current_nodes:
-        current_nodes.sort(key=lambda node: heuristic(node, goal))
-        current_nodes = current_nodes[:beam_width]
-        next_nodes = []
+        layer = []
         for current in current_nodes:
-            if current == goal:
-                steps.append(current)
-                return steps
-            for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-                neighbor = (current[0]+delta[0], current[1]+delta[1])
-                if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                    if grid[neighbor[0]][neighbor[1]] == 1:
-                        continue
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        next_nodes.append(neighbor)
-                        steps.append(neighbor)
-        current_nodes = next_nodes
-    return steps
-
-def greedy_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    open_set = [start]
-    visited = {start}
-    steps = [start]
+            if current == target:
+                yield VISIT, current
+                yield from _path_events(parents, target)
+                return
+            counters.expanded += 1
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    parents[neighbor] = current
+                    layer.append(neighbor)
+                    yield VISIT, neighbor
+        counters.generated += len(layer)
+        counters.frontier(len(layer))
+        if tie_break == LIFO:
+            layer.reverse()
+        # Stable selection, h computed once per cell
+        current_nodes = heapq.nsmallest(beam_width, layer, key=distance)
+
+def greedy_events(grid, start, goal, heuristic=None, tie_break=FIFO):
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    distance = goal_heuristic(graph, goal, heuristic)
+    order = _tie_order(tie_break)
+    source = graph.index(start)
+    target = graph.index(goal)
+
+    # Entries are (h, tie-breaking rank, node); h is computed once per cell
+    open_set = [(distance(source), 0, source)]
+    visited = bytearray(graph.size)
+    visited[source] = 1
+    parents = predecessors(graph.size)
+    counters = search_counters()
+    counters.heap_pushes = 1
+    sequence = 0
+    yield VISIT, source
     while open_set:
-        open_set.sort(key=lambda node: heuristic(node, goal))
-        current = open_set.pop(0)
-        steps.append(current)
-        if current == goal:
+        counters.frontier(len(open_set))
+        current = heapq.heappop(open_set)[2]
+        counters.heap_pops += 1
+        yield VISIT, current
+        if current == target:
+            yield from _path_events(parents, target)
             break
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    open_set.append(neighbor)
-    return steps
-
-def iddfs_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    steps = []
-    def dls(current, depth, visited):
-        steps.append(current)
-        if current == goal:
-            return True
-        if depth == 0:
-            return False
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1 or neighbor in visited:
+        counters.expanded += 1
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parents[neighbor] = current
+                sequence += 1
+                heapq.heappush(open_set, (distance(neighbor), order * sequence, neighbor))
+                counters.heap_pushes += 1
+                counters.generated += 1
+                yield PUSH, neighbor
+
+# Cells remembered per iterative-deepening pass to prune re-expansions;
+# once full, further cells are searched without pruning
+TRANSPOSITION_LIMIT = 1 << 16
+# Slack for comparing sums of float edge costs
+COST_EPSILON = 1e-9
+
+def _bounded_dfs_events(graph, source, target, bound, h=None, weighted=False, table_size=0, restart=False):
+    """One depth-first pass that skips cells whose ``g + h`` exceeds ``bound``.
+
+    Uses an explicit stack, so depth is not limited by the recursion limit.
+    Cells already on the current path are skipped; with ``table_size`` the
+    best ``g`` seen per cell (up to that many cells) also prunes cells
+    reached again at no lower cost. Costs are edge weights if ``weighted``,
+    else step counts. Returns ``(path, next_bound)``: the flat-id path, or
+    None, and the smallest ``g + h`` that was cut off (inf if none). With
+    ``restart`` (a later deepening pass) the source counts as generated
+    again.
+    """
+    offsets, targets = graph.csr()
+    weights = graph.edge_weights()
+    counters = search_counters()
+    yield VISIT, source
+    if source == target:
+        return [source], float('inf')
+    next_bound = float('inf')
+    table = {source: 0.0} if table_size else None
+    on_path = bytearray(graph.size)
+    on_path[source] = 1
+    path = [source]
+    costs = [0.0]
+    edges = [offsets[source]]
+    # A cell counts as expanded when its successors start being generated
+    counters.expanded += 1
+    if restart:
+        counters.generated += 1
+    while path:
+        node = path[-1]
+        edge = edges[-1]
+        if edge == offsets[node + 1]:
+            on_path[node] = 0
+            path.pop()
+            costs.pop()
+            edges.pop()
+            continue
+        edges[-1] = edge + 1
+        neighbor = targets[edge]
+        if on_path[neighbor]:
+            continue
+        g = costs[-1] + (weights[edge] if weighted else 1)
+        f = g + h(neighbor) if h is not None else g
+        if f > bound + COST_EPSILON:
+            if f < next_bound:
+                next_bound = f
+            continue
+        if table is not None:
+            seen = table.get(neighbor)
+            if seen is not None and seen <= g + COST_EPSILON:
+                continue
+            if seen is not None or len(table) < table_size:
+                table[neighbor] = g
+        counters.generated += 1
+        yield VISIT, neighbor
+        if neighbor == target:
+            path.append(neighbor)
+            return path, next_bound
+        on_path[neighbor] = 1
+        path.append(neighbor)
+        costs.append(g)
+        edges.append(offsets[neighbor])
+        counters.expanded += 1
+        counters.frontier(len(path))
+    return None, next_bound
+
+def _deepening_events(graph, source, target, bound, h=None, weighted=False, table_size=0):
+    # Repeat bounded passes, raising the bound to the smallest cost cut off,
+    # until the target is found or nothing was cut off
+    restart = False
+    while bound < float('inf'):
+        path, bound = yield from _bounded_dfs_events(graph, source, target, bound, h, weighted, table_size,
+                                                     restart)
+        restart = True
+        if path is not None:
+            for node in path:
+                yield PATH, node
+            return
+
+def iddfs_events(grid, start, goal, table_size=TRANSPOSITION_LIMIT):
+    """Iterative deepening DFS over step counts with an explicit stack."""
+    graph = grid_graph(grid)
+    yield from _deepening_events(graph, graph.index(start), graph.index(goal), 0, table_size=table_size)
+
+def ida_star_events(grid, start, goal, heuristic=None, table_size=TRANSPOSITION_LIMIT):
+    """IDA*: depth-first passes bounded by ``f = g + h`` over edge costs,
+    each bound the smallest ``f`` the previous pass cut off. Optimal with
+    an admissible heuristic, with memory linear in the path length plus the
+    bounded transposition table."""
+    graph = grid_graph(grid)
+    h = goal_heuristic(graph, goal, heuristic)
+    source = graph.index(start)
+    yield from _deepening_events(graph, source, graph.index(goal), h(source), h, True, table_size)
+
+def _stitched_path(forward, backward, meeting):
+    # Flat-id path from the forward root through ``meeting`` to the
+    # backward root
+    path = trace_path(forward, meeting)
+    path.extend(reversed(trace_path(backward, backward[meeting])))
+    return path
+
+def bidirectional_events(grid, start, goal):
+    """BFS from both ends, one whole layer of the smaller frontier at a time.
+
+    Each side keeps step counts and predecessors in flat arrays. The first
+    layer that reaches cells seen from the other side ends the search, and
+    the meeting cell with the fewest total steps joins the two chains into
+    a shortest path.
+    """
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    source = graph.index(start)
+    target = graph.index(goal)
+    depths = (predecessors(graph.size), predecessors(graph.size))  # step counts, -1 if unseen
+    parents = (predecessors(graph.size), predecessors(graph.size))
+    depths[0][source] = 0
+    depths[1][target] = 0
+    yield VISIT, source
+    if source == target:
+        yield PATH, source
+        return
+    yield VISIT, target
+    frontiers = [[source], [target]]
+    counters = search_counters()
+    while frontiers[0] and frontiers[1]:
+        counters.frontier(len(frontiers[0]) + len(frontiers[1]))
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        depth, other, parent = depths[side], depths[1 - side], parents[side]
+        layer = []
+        meeting = -1
+        shortest = graph.size
+        for current in frontiers[side]:
+            counters.expanded += 1
+            steps = depth[current] + 1
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if depth[neighbor] >= 0:
                     continue
-                visited.add(neighbor)
-                if dls(neighbor, depth-1, visited):
-                    return True
-                visited.remove(neighbor)
-        return False
-    max_depth = rows * cols
-    for depth in range(max_depth):
-        visited = {start}
-        if dls(start, depth, visited):
+                depth[neighbor] = steps
+                parent[neighbor] = current
+                layer.append(neighbor)
+                counters.generated += 1
+                yield VISIT, neighbor
+                if other[neighbor] >= 0 and steps + other[neighbor] < shortest:
+                    meeting = neighbor
+                    shortest = steps + other[neighbor]
+        if meeting >= 0:
+            for node in _stitched_path(parents[0], parents[1], meeting):
+                yield PATH, node
+            return
+        frontiers[side] = layer
+
+def bidirectional_astar_events(grid, start, goal, heuristic=None):
+    """A* from both ends over edge costs, expanding the side with the smaller
+    open set.
+
+    Both searches share the averaged potential ``(h_goal - h_start) / 2``
+    (negated backwards), which stays consistent in either direction. The
+    search stops once the two smallest open keys add up to the best path
+    found through a meeting cell, which makes that path optimal with an
+    admissible heuristic.
+    """
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    weights = (graph.edge_weights(), graph.reverse_edge_weights())
+    to_goal = goal_heuristic(graph, goal, heuristic)
+    to_start = goal_heuristic(graph, start, heuristic)
+    source = graph.index(start)
+    target = graph.index(goal)
+    if source == target:
+        yield VISIT, source
+        yield PATH, source
+        return
+
+    def potential(node):
+        return (to_goal(node) - to_start(node)) / 2
+
+    g_scores = (memoryview(np.full(graph.size, np.inf)), memoryview(np.full(graph.size, np.inf)))
+    parents = (predecessors(graph.size), predecessors(graph.size))
+    closed = (bytearray(graph.size), bytearray(graph.size))
+    g_scores[0][source] = 0.0
+    g_scores[1][target] = 0.0
+    open_sets = ([(potential(source), source)], [(-potential(target), target)])
+    signs = (1, -1)
+    best = math.inf
+    meeting = -1
+    counters = search_counters()
+    counters.heap_pushes = 2
+
+    while open_sets[0] and open_sets[1]:
+        if open_sets[0][0][0] + open_sets[1][0][0] >= best:
             break
-    return steps
-
-def bidirectional_search(grid, start, goal):
-    rows = len(grid)
-    cols = len(grid[0])
-    queue_start = [start]
-    queue_goal = [goal]
-    visited_start = {start}
-    visited_goal = {goal}
-    steps = [start, goal]
-    while queue_start and queue_goal:
-        current_start = queue_start.pop(0)
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current_start[0]+delta[0], current_start[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                if neighbor in visited_start:
-                    continue
-                visited_start.add(neighbor)
-                queue_start.append(neighbor)
-                steps.append(neighbor)
-                if neighbor in visited_goal:
-                    return steps
-        current_goal = queue_goal.pop(0)
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current_goal[0]+delta[0], current_goal[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                if neighbor in visited_goal:
-                    continue
-                visited_goal.add(neighbor)
-                queue_goal.append(neighbor)
-                steps.append(neighbor)
-                if neighbor in visited_start:
-                    return steps
-    return steps
-
-def depth_limited_dfs(grid, start, goal, limit=20):
-    rows = len(grid)
-    cols = len(grid[0])
-    steps = []
-    def dls(current, depth, visited):
-        steps.append(current)
-        if current == goal:
-            return True
-        if depth == 0:
-            return False
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1 or neighbor in visited:
-                    continue
-                visited.add(neighbor)
-                if dls(neighbor, depth-1, visited):
-                    return True
-                visited.remove(neighbor)
-        return False
-    visited = {start}
-    dls(start, limit, visited)
-    return steps
-
-def random_walk_search(grid, start, goal, max_steps=1000):
-    rows = len(grid)
-    cols = len(grid[0])
-    current = start
-    steps = [current]
+        counters.frontier(len(open_sets[0]) + len(open_sets[1]))
+        side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+        open_set, g_score, other = open_sets[side], g_scores[side], g_scores[1 - side]
+        current = heapq.heappop(open_set)[1]
+        counters.heap_pops += 1
+        if closed[side][current]:
+            counters.stale_pops += 1
+            continue
+        closed[side][current] = 1
+        counters.expanded += 1
+        yield VISIT, current
+        g = g_score[current]
+        weight, parent, sign = weights[side], parents[side], signs[side]
+        for edge in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[edge]
+            tentative_g = g + weight[edge]
+            if tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                parent[neighbor] = current
+                heapq.heappush(open_set, (tentative_g + sign * potential(neighbor), neighbor))
+                counters.heap_pushes += 1
+                counters.generated += 1
+                yield PUSH, neighbor
+                if tentative_g + other[neighbor] < best:
+                    best = tentative_g + other[neighbor]
+                    meeting = neighbor
+
+    if meeting >= 0:
+        for node in _stitched_path(parents[0], parents[1], meeting):
+            yield PATH, node
+
+def depth_limited_events(grid, start, goal, limit=20, table_size=TRANSPOSITION_LIMIT):
+    graph = grid_graph(grid)
+    path, _ = yield from _bounded_dfs_events(graph, graph.index(start), graph.index(goal), limit,
+                                             table_size=table_size)
+    for node in path or ():
+        yield PATH, node
+
+def random_walk_events(grid, start, goal, max_steps=1000, seed=None):
+    # A fixed ``seed`` makes the walk reproducible (and so cacheable)
+    rng = random.Random(seed) if seed is not None else random
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    current = graph.index(start)
+    target = graph.index(goal)
+    # Cells keep the predecessor they were first entered from, so the path
+    # is the walk with its loops cut out
+    visited = bytearray(graph.size)
+    visited[current] = 1
+    parents = predecessors(graph.size)
+    counters = search_counters()
+    yield VISIT, current
     for _ in range(max_steps):
-        if current == goal:
+        if current == target:
+            yield from _path_events(parents, target)
             break
-        neighbors = []
-        for delta in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+delta[0], current[1]+delta[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols:
-                if grid[neighbor[0]][neighbor[1]] == 1:
-                    continue
-                neighbors.append(neighbor)
+        neighbors = targets[offsets[current]:offsets[current + 1]]
         if not neighbors:
             break
-        current = random.choice(neighbors)
-        steps.append(current)
-    return steps
+        counters.expanded += 1
+        previous, current = current, rng.choice(neighbors)
+        if not visited[current]:
+            visited[current] = 1
+            parents[current] = previous
+        yield VISIT, current
 
-def q_learning_search(grid, start, goal, episodes=5000, learning_rate=0.1, discount_factor=0.95, epsilon=1.0, min_epsilon=0.05, epsilon_decay=0.99, max_steps_per_episode=400, clear_callback=None):
+def q_learning_events(grid, start, goal, episodes=5000, learning_rate=0.1, discount_factor=0.95, epsilon=1.0, min_epsilon=0.05, epsilon_decay=0.99, max_steps_per_episode=400, clear_callback=None, seed=None, parallel_episodes=64, warm_start=False, warm_episodes=300, warm_epsilon=0.3):
     """
     Advanced Q-Learning for pathfinding with:
     - Distance-based reward
@@ -273,128 +761,132 @@ def q_learning_search(grid, start, goal, episodes=5000, learning_rate=0.1, disco
     - Faster epsilon decay
     - Early episode termination
     - Visualization callback to clear highlights every 1000 episodes
+    - Reproducible runs for a fixed ``seed``
+
+    Training runs in QLearningEngine with up to ``parallel_episodes``
+    episodes stepped together; 1 runs them strictly one after another.
+    With ``warm_start`` the table learned by the previous run on this grid
+    (or loaded with q_learning.load_table) is reused, with the cells around
+    any edits reset, and only ``warm_episodes`` episodes are trained.
     """
-    rows = len(grid)
-    cols = len(grid[0])
-    
-    # Initialize Q-table
-    q_table = {}
-    for i in range(rows):
-        for j in range(cols):
-            if grid[i][j] != 1:  # Only initialize for non-wall cells
-                q_table[(i, j)] = {
-                    (-1, 0): 0,  # up
-                    (1, 0): 0,   # down
-                    (0, -1): 0,  # left
-                    (0, 1): 0    # right
-                }
-    
-    steps = [start]  # Track exploration steps
-    for episode in range(episodes):
-        state = start
-        visited_in_episode = {start}
-        recent_states = []  # For oscillation detection
-        for step in range(max_steps_per_episode):
-            # Epsilon-greedy action selection
-            if random.random() < epsilon:
-                action = random.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
-            else:
-                action = max(q_table[state].items(), key=lambda x: x[1])[0]
-            
-            next_state = (state[0] + action[0], state[1] + action[1])
-            reward = -1  # Default step penalty
-            prev_dist = abs(state[0] - goal[0]) + abs(state[1] - goal[1])
-            # Check if next state is valid
-            if (0 <= next_state[0] < rows and 0 <= next_state[1] < cols):
-                if grid[next_state[0]][next_state[1]] == 1:
-                    reward = -20  # Strong wall penalty
-                    next_state = state  # Stay in place
-                elif next_state == goal:
-                    reward = 100  # Goal reward
-                elif next_state not in visited_in_episode:
-                    reward = 2  # Reward for new cell
-                else:
-                    reward = -20  # Strong penalty for revisiting (loop)
-            else:
-                reward = -20  # Out of bounds penalty
-                next_state = state  # Stay in place
-            
-            # Distance-based reward
-            new_dist = abs(next_state[0] - goal[0]) + abs(next_state[1] - goal[1])
-            if new_dist < prev_dist:
-                reward += 3  # Getting closer
-            elif new_dist > prev_dist:
-                reward -= 3  # Getting further
-            
-            # Dead end check (if not goal or wall)
-            if (next_state != goal and grid[next_state[0]][next_state[1]] != 1):
-                valid_moves = 0
-                for d in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    neighbor = (next_state[0]+d[0], next_state[1]+d[1])
-                    if (0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and
-                        grid[neighbor[0]][neighbor[1]] != 1 and neighbor != state):
-                        valid_moves += 1
-                if valid_moves == 0:
-                    reward += -30  # Strong dead end penalty
-            
-            # Oscillation/short loop penalty
-            recent_states.append(state)
-            if len(recent_states) > 6:
-                recent_states.pop(0)
-            if recent_states.count(state) > 2:
-                reward -= 30  # Strong penalty for oscillation
-            
-            # Q-learning update
-            old_value = q_table[state][action]
-            next_max = max(q_table[next_state].values())
-            new_value = (1 - learning_rate) * old_value + learning_rate * (reward + discount_factor * next_max)
-            q_table[state][action] = new_value
-            
-            state = next_state
-            steps.append(state)
-            visited_in_episode.add(state)
-            if state == goal:
-                # Bonus for short path
-                reward += 100 * (rows * cols / (step + 1))
-                break
-        # Decay epsilon faster
-        if epsilon > min_epsilon:
-            epsilon *= epsilon_decay
-            epsilon = max(min_epsilon, epsilon)
-        # Clear highlights every 1000 episodes
-        if clear_callback and episode > 0 and episode % 1000 == 0:
-            clear_callback()
-    
+    grid = as_grid_model(grid)
+    graph = grid_graph(grid)
+    engine = QLearningEngine(graph, goal)
+    if warm_start and warm_start_engine(engine, grid, goal):
+        episodes, epsilon = warm_episodes, max(min_epsilon, warm_epsilon)
+    source = graph.index(start)
+    # Unseeded runs still follow random.seed(), as the benchmark relies on
+    rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+
+    counters = search_counters()
+    yield VISIT, source  # Track exploration steps
+    for states in engine.train(source, episodes, learning_rate, discount_factor, epsilon, min_epsilon,
+                               epsilon_decay, max_steps_per_episode, rng, parallel_episodes, clear_callback):
+        counters.expanded += len(states)
+        for state in states.tolist():
+            yield VISIT, state
+    remember_table(grid, engine, goal)
+
     # Extract the final path using the learned Q-values
-    path = [start]
-    current = start
-    visited = {start}
-    for _ in range(rows * cols):
-        action = max(q_table[current].items(), key=lambda x: x[1])[0]
-        next_state = (current[0] + action[0], current[1] + action[1])
-        if (0 <= next_state[0] < rows and 0 <= next_state[1] < cols and
-            grid[next_state[0]][next_state[1]] != 1 and next_state not in visited):
-            current = next_state
-            path.append(current)
-            visited.add(current)
-            if current == goal:
-                break
-        else:
-            break
-    if path[-1] != goal:
-        path = []  # No valid path found
-    return steps, path
+    path = engine.greedy_path(source)
+    if path[-1] == engine.target:  # Otherwise no valid path was found
+        for node in path:
+            yield PATH, node
+
+def _collect(events_function, grid, start, goal, cancel, params):
+    grid = as_grid_model(grid)
+    return collect(events_function(grid, start, goal, **params), grid.cols, cancel)
+
+def bfs_search(grid, start, goal, cancel=None):
+    return _collect(bfs_events, grid, start, goal, cancel, {})
+
+def frontier_bfs_search(grid, start, goal, cancel=None):
+    return _collect(frontier_bfs_events, grid, start, goal, cancel, {})
+
+def dfs_search(grid, start, goal, cancel=None):
+    return _collect(dfs_events, grid, start, goal, cancel, {})
+
+def astar_search(grid, start, goal, heuristic=None, queue=BINARY_HEAP, cancel=None):
+    return _collect(astar_events, grid, start, goal, cancel, {"heuristic": heuristic, "queue": queue})
+
+def jps_search(grid, start, goal, cancel=None):
+    return _collect(jps_events, grid, start, goal, cancel, {})
+
+def hpa_search(grid, start, goal, cluster_size=DEFAULT_CLUSTER_SIZE, cancel=None):
+    return _collect(hpa_events, grid, start, goal, cancel, {"cluster_size": cluster_size})
+
+def dstar_lite_search(grid, start, goal, cancel=None):
+    return _collect(dstar_lite_events, grid, start, goal, cancel, {})
+
+def dijkstra_search(grid, start, goal, queue=BINARY_HEAP, cancel=None):
+    return _collect(dijkstra_events, grid, start, goal, cancel, {"queue": queue})
+
+def beam_search(grid, start, goal, beam_width=3, heuristic=None, tie_break=FIFO, cancel=None):
+    params = {"beam_width": beam_width, "heuristic": heuristic, "tie_break": tie_break}
+    return _collect(beam_events, grid, start, goal, cancel, params)
+
+def greedy_search(grid, start, goal, heuristic=None, tie_break=FIFO, cancel=None):
+    return _collect(greedy_events, grid, start, goal, cancel, {"heuristic": heuristic, "tie_break": tie_break})
+
+def iddfs_search(grid, start, goal, table_size=TRANSPOSITION_LIMIT, cancel=None):
+    return _collect(iddfs_events, grid, start, goal, cancel, {"table_size": table_size})
+
+def ida_star_search(grid, start, goal, heuristic=None, table_size=TRANSPOSITION_LIMIT, cancel=None):
+    return _collect(ida_star_events, grid, start, goal, cancel, {"heuristic": heuristic, "table_size": table_size})
+
+def bidirectional_search(grid, start, goal, cancel=None):
+    return _collect(bidirectional_events, grid, start, goal, cancel, {})
+
+def bidirectional_astar_search(grid, start, goal, heuristic=None, cancel=None):
+    return _collect(bidirectional_astar_events, grid, start, goal, cancel, {"heuristic": heuristic})
+
+def depth_limited_dfs(grid, start, goal, limit=20, table_size=TRANSPOSITION_LIMIT, cancel=None):
+    return _collect(depth_limited_events, grid, start, goal, cancel, {"limit": limit, "table_size": table_size})
+
+def random_walk_search(grid, start, goal, max_steps=1000, seed=None, cancel=None):
+    return _collect(random_walk_events, grid, start, goal, cancel, {"max_steps": max_steps, "seed": seed})
+
+def q_learning_search(grid, start, goal, cancel=None, **params):
+    """List-returning Q-Learning; ``params`` are passed to q_learning_events."""
+    return _collect(q_learning_events, grid, start, goal, cancel, params)
 
 ALGORITHMS = {
     "BFS": bfs_search,
+    "BFS (Frontier)": frontier_bfs_search,
     "DFS": dfs_search,
     "A*": astar_search,
+    "IDA*": ida_star_search,
+    "Jump Point Search": jps_search,
+    "HPA*": hpa_search,
+    "D* Lite": dstar_lite_search,
     "Dijkstra": dijkstra_search,
     "Beam Search": beam_search,
     "Greedy Best-First": greedy_search,
     "IDDFS": iddfs_search,
     "Bidirectional BFS": bidirectional_search,
+    "Bidirectional A*": bidirectional_astar_search,
     "Depth-Limited DFS": depth_limited_dfs,
     "Random Walk": random_walk_search,
     "Q-Learning": q_learning_search,
 }
+
+# Streaming counterparts of ALGORITHMS: generators of (kind, cell_id) events.
+ALGORITHM_EVENTS = {
+    "BFS": bfs_events,
+    "BFS (Frontier)": frontier_bfs_events,
+    "DFS": dfs_events,
+    "A*": astar_events,
+    "IDA*": ida_star_events,
+    "Jump Point Search": jps_events,
+    "HPA*": hpa_events,
+    "D* Lite": dstar_lite_events,
+    "Dijkstra": dijkstra_events,
+    "Beam Search": beam_events,
+    "Greedy Best-First": greedy_events,
+    "IDDFS": iddfs_events,
+    "Bidirectional BFS": bidirectional_events,
+    "Bidirectional A*": bidirectional_astar_events,
+    "Depth-Limited DFS": depth_limited_events,
+    "Random Walk": random_walk_events,
+    "Q-Learning": q_learning_events,
+}
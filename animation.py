@@ -1,45 +1,104 @@
 from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtGui import QColor
 # Для плавных анимаций можно использовать QPropertyAnimation – здесь оставляем QTimer как базовый вариант
 
+# Интервал кадра в режиме пакетного воспроизведения (~60 кадров в секунду)
+FRAME_INTERVAL = 16
+
+
 class Animator:
-    def __init__(self, grid_widget, steps, path=None, interval=200):
+    def __init__(self, grid_widget, steps, path=None, interval=200, complete=True, steps_per_second=0,
+                 on_finished=None):
         """
         :param grid_widget: экземпляр GridWidget для обновления отображения.
         :param steps: список шагов, полученный от алгоритма.
         :param path: список координат финального пути (если есть).
         :param interval: интервал обновления в миллисекундах.
+        :param complete: False, пока шаги ещё поступают через extend_steps().
+        :param steps_per_second: целевая скорость воспроизведения; если больше 0,
+            за каждый кадр применяется пачка шагов вместо одного шага на интервал.
+        :param on_finished: вызывается один раз, когда воспроизведение дошло до конца.
         """
         self.grid_widget = grid_widget
         self.steps = steps
         self.path = path
+        self.path_cells = set(path) if path else set()
         self.interval = interval
+        self.steps_per_second = steps_per_second
+        self.complete = complete
         self.current_step = 0
+        self.visit_color = QColor("yellow")
+        self.path_color = QColor("blue")
+        self.undo_color = QColor("lightGray")
         self.timer = QTimer()
-        self.timer.timeout.connect(self.animate_step)
+        self.timer.timeout.connect(self.animate_tick)
         self.is_running = False
+        self.on_finished = on_finished
 
     def start(self):
         self.is_running = True
-        self.timer.start(self.interval)
+        self.timer.start(FRAME_INTERVAL if self.steps_per_second > 0 else self.interval)
 
     def stop(self):
         self.is_running = False
         self.timer.stop()
 
+    def steps_per_tick(self):
+        if self.steps_per_second > 0:
+            return max(1, round(self.steps_per_second * FRAME_INTERVAL / 1000))
+        return 1
+
+    def paint_step(self, index):
+        cell = self.steps[index]
+        # Подсвечиваем ячейку (если она не является стартовой или конечной)
+        if cell != self.grid_widget.start_point and cell != self.grid_widget.end_point:
+            # Если это часть финального пути, окрашиваем в синий
+            if cell in self.path_cells:
+                self.grid_widget.set_cell_color(cell, self.path_color)
+            else:
+                self.grid_widget.set_cell_color(cell, self.visit_color)
+
+    def animate_tick(self):
+        """Apply the next batch of steps with a single repaint of the view."""
+        end = min(self.current_step + self.steps_per_tick(), len(self.steps))
+        if self.current_step >= end:
+            if self.complete:
+                self.stop()
+                self.notify_finished()
+            return
+        with self.grid_widget.batch_update():
+            for index in range(self.current_step, end):
+                self.paint_step(index)
+        self.current_step = end
+
     def animate_step(self):
         if self.current_step < len(self.steps):
-            i, j = self.steps[self.current_step]
-            # Подсвечиваем ячейку (если она не является стартовой или конечной)
-            if (i, j) != self.grid_widget.start_point and (i, j) != self.grid_widget.end_point:
-                # Если это часть финального пути, окрашиваем в синий
-                if self.path and (i, j) in self.path:
-                    self.grid_widget.cells[(i, j)].setBrush(QBrush(QColor("blue")))
-                else:
-                    self.grid_widget.cells[(i, j)].setBrush(QBrush(QColor("yellow")))
+            self.paint_step(self.current_step)
             self.current_step += 1
-        else:
+        elif self.complete:
             self.stop()
+            self.notify_finished()
+
+    def notify_finished(self):
+        callback, self.on_finished = self.on_finished, None
+        if callback is not None:
+            callback()
+
+    def extend_steps(self, chunk):
+        """Append steps streamed from a running search."""
+        self.steps.extend(chunk)
+
+    def finish(self, path=None):
+        """Mark the stream complete and recolour path cells already drawn."""
+        self.complete = True
+        self.path = path
+        self.path_cells = set(path) if path else set()
+        if path:
+            with self.grid_widget.batch_update():
+                for index in range(self.current_step):
+                    cell = self.steps[index]
+                    if cell in self.path_cells and cell != self.grid_widget.start_point and cell != self.grid_widget.end_point:
+                        self.grid_widget.set_cell_color(cell, self.path_color)
 
     def step_forward(self):
         """Execute one step forward manually."""
@@ -53,16 +112,16 @@ class Animator:
         if self.current_step > 0:
             self.current_step -= 1
             # Reset the color of the current cell
-            i, j = self.steps[self.current_step]
-            if (i, j) != self.grid_widget.start_point and (i, j) != self.grid_widget.end_point:
+            cell = self.steps[self.current_step]
+            if cell != self.grid_widget.start_point and cell != self.grid_widget.end_point:
                 # If it was part of the path, we need to check if it should remain blue
-                if self.path and (i, j) in self.path:
-                    self.grid_widget.cells[(i, j)].setBrush(QBrush(QColor("blue")))
+                if cell in self.path_cells:
+                    self.grid_widget.set_cell_color(cell, self.path_color)
                 else:
-                    self.grid_widget.cells[(i, j)].setBrush(QBrush(QColor("lightGray")))
+                    self.grid_widget.set_cell_color(cell, self.undo_color)
             return True
         return False
 
     def is_finished(self):
         """Check if the animation has reached the end."""
-        return self.current_step >= len(self.steps)
+        return self.complete and self.current_step >= len(self.steps)
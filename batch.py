@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from algorithms import ALGORITHMS, path_cost
+from grid_model import GridModel, as_grid_model
+from profiling import RunProfiler, merge_profiles, profile_directory, profile_filename
+from result_cache import cached_search
+
+_worker_model = None
+_worker_memory = None
+
+
+def _costs_offset(size):
+    # float32 costs start on the next 4-byte boundary after the walls
+    return (size + 3) & ~3
+
+
+def _attach_grid(name, rows, cols, connectivity, corner_cutting):
+    global _worker_model, _worker_memory
+    # Pool workers share the parent's resource tracker, so attaching here
+    # does not take ownership; the parent unlinks the segment.
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    size = rows * cols
+    walls = np.ndarray(size, dtype=np.uint8, buffer=_worker_memory.buf)
+    costs = np.ndarray(size, dtype=np.float32, buffer=_worker_memory.buf, offset=_costs_offset(size))
+    walls.flags.writeable = False
+    costs.flags.writeable = False
+    _worker_model = GridModel(rows, cols, walls=walls, costs=costs,
+                              connectivity=connectivity, corner_cutting=corner_cutting)
+
+
+def solve(grid, start, goal, algorithm, params=None, keep_steps=False, cache=None):
+    """Run one registry algorithm and summarise its result as a dict.
+
+    Runs go through result_cache.cached_search, so repeated queries are
+    replayed from ``cache`` (the module default if not given) where the
+    algorithm and parameters allow it.
+    """
+    steps, path = cached_search(algorithm, grid, tuple(start), tuple(goal), cache, **(params or {}))
+    summary = {
+        "algorithm": algorithm,
+        "start": tuple(start),
+        "goal": tuple(goal),
+        "Nodes visited": len(steps),
+        "Path length": len(path) if path else None,
+        "Path cost": path_cost(grid, path) if path else None,
+        "path": path,
+    }
+    if keep_steps:
+        summary["steps"] = steps
+    return summary
+
+
+def _solve_chunk(jobs, keep_steps, profile=None):
+    # Returns the results and, when profiling, the chunk's .pstats file
+    if profile is None:
+        return [solve(_worker_model, *job, keep_steps=keep_steps) for job in jobs], None
+    profiler = RunProfiler("batch-chunk")
+    with profiler.profiling():
+        results = [solve(_worker_model, *job, keep_steps=keep_steps) for job in jobs]
+    return results, profiler.save(profile)
+
+
+def run_batch(grid, jobs, max_workers=None, chunksize=None, keep_steps=False, profile=None):
+    """Solve many queries on one grid in parallel.
+
+    The grid is copied once into shared memory and mapped read-only by every
+    worker, so only job tuples and results are pickled.
+
+    :param grid: ``GridModel`` or nested-list grid shared by every job.
+    :param jobs: iterable of ``(start, goal, algorithm)`` or
+        ``(start, goal, algorithm, params)`` tuples.
+    :param max_workers: process count, defaults to ``os.cpu_count()``.
+    :param chunksize: jobs per task sent to a worker.
+    :param keep_steps: also return the full visit list of every job.
+    :param profile: directory to save one cProfile ``batch-*.pstats`` of
+        all workers to; defaults to the PATHFINDING_PROFILE setting.
+    :return: list of result dicts in job order.
+    """
+    model = as_grid_model(grid)
+    profile = profile or profile_directory()
+    jobs = [tuple(job) for job in jobs]
+    for job in jobs:
+        if job[2] not in ALGORITHMS:
+            raise KeyError(f"Unknown algorithm: {job[2]}")
+    if not jobs:
+        return []
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (max_workers * 4))
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    size = model.size
+    offset = _costs_offset(size)
+    memory = shared_memory.SharedMemory(create=True, size=max(1, offset + 4 * size))
+    try:
+        np.ndarray(size, dtype=np.uint8, buffer=memory.buf)[:] = model.walls
+        np.ndarray(size, dtype=np.float32, buffer=memory.buf, offset=offset)[:] = model.costs
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_grid,
+                                 initargs=(memory.name, model.rows, model.cols,
+                                           model.connectivity, model.corner_cutting)) as pool:
+            results = []
+            profiles = []
+            for chunk_results, chunk_profile in pool.map(_solve_chunk, chunks, [keep_steps] * len(chunks),
+                                                         [profile] * len(chunks)):
+                results.extend(chunk_results)
+                if chunk_profile is not None:
+                    profiles.append(chunk_profile)
+        if profiles:
+            merge_profiles(profiles, profile_filename(profile, "batch"))
+            for filename in profiles:
+                os.remove(filename)
+        return results
+    finally:
+        memory.close()
+        memory.unlink()
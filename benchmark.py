@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import inspect
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from algorithms import ALGORITHMS
+from frontier_bfs import distance_field
+from grid_graph import grid_graph
+from grid_model import WALL, GridModel
+from instrumentation import RunStats
+from priority_queue import QUEUES
+from search_control import CancelToken, SearchCancelled
+
+DEFAULT_SIZES = (32, 64, 128)
+DEFAULT_TIMEOUT = 10.0
+# Maps drawn from the generator's rng before giving up on a reachable goal
+MAX_MAP_ATTEMPTS = 100
+CSV_FIELDS = (
+    "map", "size", "map_attempts", "algorithm", "status", "wall_time", "nodes_expanded",
+    "reached_goal", "peak_memory", "path_length", "optimal_length", "optimality_gap",
+)
+
+
+class DeadlineToken(CancelToken):
+    """Cancel token that trips by itself once ``timeout`` seconds have passed."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.deadline = time.perf_counter() + timeout if timeout else None
+
+    @property
+    def cancelled(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    @cancelled.setter
+    def cancelled(self, value):
+        if value:
+            self.deadline = 0
+
+
+def open_map(rows, cols, rng):
+    return GridModel(rows, cols, start=(0, 0), end=(rows - 1, cols - 1))
+
+
+def random_map(rows, cols, rng, density=0.3):
+    model = GridModel(rows, cols, start=(0, 0), end=(rows - 1, cols - 1))
+    model.walls[:] = rng.random(rows * cols) < density
+    model.walls[0] = model.walls[-1] = 0
+    return model
+
+
+def maze_map(rows, cols, rng):
+    """Perfect maze carved by an iterative backtracker on even coordinates."""
+    walls = np.full((rows, cols), WALL, dtype=np.uint8)
+    cell_rows, cell_cols = (rows + 1) // 2, (cols + 1) // 2
+    seen = np.zeros((cell_rows, cell_cols), dtype=bool)
+    seen[0, 0] = True
+    walls[0, 0] = 0
+    stack = [(0, 0)]
+    while stack:
+        a, b = stack[-1]
+        options = [(a + da, b + db) for da, db in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                   if 0 <= a + da < cell_rows and 0 <= b + db < cell_cols and not seen[a + da, b + db]]
+        if not options:
+            stack.pop()
+            continue
+        na, nb = options[rng.integers(len(options))]
+        seen[na, nb] = True
+        walls[a + na, b + nb] = 0  # проход между соседними ячейками
+        walls[2 * na, 2 * nb] = 0
+        stack.append((na, nb))
+    end = (2 * (cell_rows - 1), 2 * (cell_cols - 1))
+    return GridModel(rows, cols, walls=walls.reshape(-1), start=(0, 0), end=end)
+
+
+def rooms_map(rows, cols, rng, room_size=8):
+    """Rooms separated by wall lines, one random door per wall segment."""
+    walls = np.zeros((rows, cols), dtype=np.uint8)
+    row_lines = list(range(room_size, rows - 1, room_size + 1))
+    col_lines = list(range(room_size, cols - 1, room_size + 1))
+    for i in row_lines:
+        walls[i, :] = WALL
+    for j in col_lines:
+        walls[:, j] = WALL
+    row_bounds = [-1] + row_lines + [rows]
+    col_bounds = [-1] + col_lines + [cols]
+    for i in row_lines:
+        for left, right in zip(col_bounds, col_bounds[1:]):
+            walls[i, rng.integers(left + 1, right)] = 0
+    for j in col_lines:
+        for top, bottom in zip(row_bounds, row_bounds[1:]):
+            walls[rng.integers(top + 1, bottom), j] = 0
+    return GridModel(rows, cols, walls=walls.reshape(-1), start=(0, 0), end=(rows - 1, cols - 1))
+
+
+def spiral_map(rows, cols, rng, gap=1):
+    """Nested square rings with alternating openings; the goal is the centre."""
+    walls = np.zeros((rows, cols), dtype=np.uint8)
+    ring = 0
+    for depth in range(gap + 1, min(rows, cols) // 2, gap + 1):
+        top, left, bottom, right = depth, depth, rows - 1 - depth, cols - 1 - depth
+        if bottom - top < 2 or right - left < 2:
+            break
+        walls[top, left:right + 1] = WALL
+        walls[bottom, left:right + 1] = WALL
+        walls[top:bottom + 1, left] = WALL
+        walls[top:bottom + 1, right] = WALL
+        if ring % 2:
+            walls[bottom, right - 1] = 0
+        else:
+            walls[top, left + 1] = 0
+        ring += 1
+    end = (rows // 2, cols // 2)
+    walls[end] = 0
+    return GridModel(rows, cols, walls=walls.reshape(-1), start=(0, 0), end=end)
+
+
+MAPS = {
+    "open": open_map,
+    "random": random_map,
+    "maze": maze_map,
+    "rooms": rooms_map,
+    "spiral": spiral_map,
+}
+
+
+def fresh_model(model):
+    """Copy of ``model`` with its graph built but none of the state that
+    D* Lite and HPA* keep per model, so every run starts cold."""
+    model = model.copy()
+    grid_graph(model)  # строим граф заранее, чтобы не мерить его в прогоне
+    return model
+
+
+def generate_map(name, size, rng, max_attempts=MAX_MAP_ATTEMPTS):
+    """Draw ``name`` maps from ``rng`` until the goal is reachable from the
+    start; returns ``(model, distance, attempts)`` with the BFS step
+    distance, -1 if no map within ``max_attempts`` was solvable."""
+    for attempt in range(1, max_attempts + 1):
+        model = MAPS[name](size, size, rng)
+        distance = int(distance_field(model, model.start)[model.end])
+        if distance >= 0:
+            break
+    return model, distance, attempt
+
+
+def run_once(model, algorithm, timeout, seed, trace_memory=False, params=None):
+    """Run one registry algorithm; returns ``(status, seconds, steps, path,
+    peak, counters)`` with the instrumentation counters of the run.
+
+    ``params`` are passed on as far as the algorithm accepts them.
+    """
+    accepted = inspect.signature(ALGORITHMS[algorithm]).parameters
+    params = {name: value for name, value in (params or {}).items() if name in accepted}
+    random.seed(seed)  # Random Walk и Q-Learning используют модуль random
+    token = DeadlineToken(timeout)
+    stats = RunStats(algorithm)
+    if trace_memory:
+        tracemalloc.start()
+    status, steps, path, peak = "ok", [], None, None
+    started = time.perf_counter()
+    try:
+        with stats.recording():
+            result = ALGORITHMS[algorithm](model, model.start, model.end, cancel=token, **params)
+        if isinstance(result, tuple):
+            steps, path = result
+        else:
+            steps = result
+    except SearchCancelled:
+        status = "timeout"
+    except Exception as exc:
+        status = f"error: {exc}"
+    elapsed = time.perf_counter() - started
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return status, elapsed, steps, path or None, peak, stats.counters()
+
+
+def benchmark(maps=None, sizes=DEFAULT_SIZES, algorithms=None, repeat=1, timeout=DEFAULT_TIMEOUT,
+              seed=0, measure_memory=True, progress=None, params=None):
+    """Run every algorithm over every generated map and size.
+
+    :param maps: names from ``MAPS`` (all by default).
+    :param sizes: side lengths of the square grids.
+    :param algorithms: names from ``ALGORITHMS`` (all by default).
+    :param repeat: timed runs per case, each on a fresh copy of the map;
+        the fastest one is reported.
+    :param timeout: seconds after which a run is cancelled and marked ``timeout``.
+    :param seed: seeds map generation and the stochastic algorithms; maps
+        whose goal is unreachable are redrawn, and ``map_attempts`` in each
+        row says how many draws it took.
+    :param measure_memory: do one extra run under ``tracemalloc`` for the peak.
+    :param progress: optional callable receiving each result row.
+    :param params: settings such as ``queue`` for the algorithms that take them.
+    :return: list of result dicts, one per (map, size, algorithm).
+    """
+    maps = list(maps or MAPS)
+    algorithms = list(algorithms or ALGORITHMS)
+    for name in algorithms:
+        if name not in ALGORITHMS:
+            raise KeyError(f"Unknown algorithm: {name}")
+    results = []
+    for map_name in maps:
+        for size in sizes:
+            model, distance, attempts = generate_map(map_name, size, np.random.default_rng(seed))
+            optimal = distance + 1 if distance >= 0 else None
+            for algorithm in algorithms:
+                best = None
+                for _ in range(max(1, repeat)):
+                    status, elapsed, steps, path, _, counters = run_once(fresh_model(model), algorithm, timeout,
+                                                                         seed, params=params)
+                    if best is None or elapsed < best[1]:
+                        best = (status, elapsed, steps, path, counters)
+                    if status != "ok":
+                        break
+                status, elapsed, steps, path, counters = best
+                peak = None
+                if measure_memory and status == "ok":
+                    peak = run_once(fresh_model(model), algorithm, timeout, seed, trace_memory=True,
+                                    params=params)[4]
+                path_length = len(path) if path else None
+                row = {
+                    "map": map_name,
+                    "size": size,
+                    "map_attempts": attempts,
+                    "algorithm": algorithm,
+                    "status": status,
+                    "wall_time": elapsed,
+                    "nodes_expanded": counters["nodes_expanded"],
+                    "reached_goal": bool(path) or model.end in steps,
+                    "peak_memory": peak,
+                    "path_length": path_length,
+                    "optimal_length": optimal,
+                    "optimality_gap": path_length - optimal if path_length and optimal else None,
+                }
+                results.append(row)
+                if progress is not None:
+                    progress(row)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save_json(filename, results, settings=None):
+    with open(filename, "w") as f:
+        json.dump({"environment": environment(), "settings": settings or {}, "results": results}, f, indent=2)
+
+
+def save_csv(filename, results):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def load_results(filename):
+    with open(filename) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline, results, tolerance=1.25):
+    """Return rows that got slower than ``tolerance`` times, expanded more
+    nodes, found longer paths or stopped finishing compared to ``baseline``."""
+    previous = {(row["map"], row["size"], row["algorithm"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get((row["map"], row["size"], row["algorithm"]))
+        if old is None:
+            continue
+        reasons = []
+        if old["status"] == "ok" and row["status"] != "ok":
+            reasons.append(f"status {row['status']}")
+        elif row["status"] == "ok" and old["status"] == "ok":
+            if row["wall_time"] > old["wall_time"] * tolerance:
+                reasons.append(f"time {old['wall_time']:.4f}s -> {row['wall_time']:.4f}s")
+            if row["nodes_expanded"] > old["nodes_expanded"]:
+                reasons.append(f"nodes {old['nodes_expanded']} -> {row['nodes_expanded']}")
+            if (row["optimality_gap"] or 0) > (old["optimality_gap"] or 0):
+                reasons.append(f"gap {old['optimality_gap']} -> {row['optimality_gap']}")
+        if reasons:
+            regressions.append((row, reasons))
+    return regressions
+
+
+def format_row(row):
+    memory = f"{row['peak_memory'] / 1024:.0f} KiB" if row["peak_memory"] is not None else "-"
+    gap = row["optimality_gap"] if row["optimality_gap"] is not None else "-"
+    return (f"{row['map']:>7} {row['size']:>5} {row['algorithm']:<18} {row['status']:<8} "
+            f"{row['wall_time']:9.4f}s {row['nodes_expanded']:>9} {memory:>10} gap {gap}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding algorithms without the GUI.")
+    parser.add_argument("--maps", nargs="+", choices=list(MAPS), help="map generators to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="grid side lengths")
+    parser.add_argument("--algorithms", nargs="+", metavar="NAME", help="algorithm names (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case, fastest is kept")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per run, 0 for none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queue", choices=list(QUEUES), help="priority queue for A* and Dijkstra")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed wall-time ratio vs baseline")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    settings = {
+        "maps": args.maps or list(MAPS),
+        "sizes": args.sizes,
+        "algorithms": args.algorithms or list(ALGORITHMS),
+        "repeat": args.repeat,
+        "timeout": args.timeout,
+        "seed": args.seed,
+        "queue": args.queue,
+    }
+    try:
+        results = benchmark(settings["maps"], args.sizes, settings["algorithms"], args.repeat,
+                            args.timeout, args.seed, not args.no_memory,
+                            None if args.quiet else lambda row: print(format_row(row), flush=True),
+                            {"queue": args.queue} if args.queue else None)
+    except KeyError as exc:
+        parser.error(str(exc))
+    if args.json:
+        save_json(args.json, results, settings)
+    if args.csv:
+        save_csv(args.csv, results)
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, args.tolerance)
+        for row, reasons in regressions:
+            print(f"REGRESSION {row['map']} {row['size']} {row['algorithm']}: {', '.join(reasons)}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms import ALGORITHM_EVENTS, collect, path_cost
+from config_manager import FILE_ERRORS, read_config
+from instrumentation import RunStats
+from profiling import RunProfiler, profile_directory
+from result_cache import ResultCache, default_cache, result_key
+
+DEFAULT_ALGORITHM = "A*"
+
+# Disk-backed result caches of this process, by directory
+_disk_caches = {}
+
+
+def result_cache(directory=None):
+    """result_cache.default_cache, or this process's cache with a disk tier
+    in ``directory``, which other processes and later runs share."""
+    if directory is None:
+        return default_cache
+    cache = _disk_caches.get(directory)
+    if cache is None:
+        cache = _disk_caches[directory] = ResultCache(directory=directory)
+    return cache
+
+
+def config_files(patterns):
+    """Expand files, directories (their ``*.json``) and glob patterns into
+    a sorted list of configuration files."""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, "*.json")))
+        elif glob.has_magic(pattern):
+            files.update(name for name in glob.glob(pattern, recursive=True) if os.path.isfile(name))
+        else:
+            files.add(pattern)
+    return sorted(files)
+
+
+def solve_config(filename, algorithm, params=None, keep_steps=False, trace_memory=False, cache_dir=None):
+    """Solve one configuration file with a registry algorithm.
+
+    Returns a result dict with the same summary keys as batch.solve plus
+    the instrumentation counters and phase timings under ``stats``; a file
+    that cannot be solved gives ``{"config", "algorithm", "error"}``.
+    Runs that result_cache allows to be replayed are looked up in the
+    cache of ``cache_dir`` (memory only if None) first; ``cached`` tells
+    whether the result came from there, without fresh counters.
+    """
+    stats = RunStats(algorithm, trace_memory)
+    try:
+        with stats.phase("grid extraction"):
+            model = read_config(filename)
+        if model.start is None or model.end is None:
+            raise ValueError("Configuration has no start or end point")
+        events_function = ALGORITHM_EVENTS[algorithm]
+        accepted = inspect.signature(events_function).parameters
+        params = {name: value for name, value in (params or {}).items() if name in accepted}
+        cache = result_cache(cache_dir)
+        key = result_key(model, model.start, model.end, algorithm, params)
+        entry = cache.get(key)
+        if entry is not None:
+            steps, path = list(entry.steps), entry.path
+        else:
+            events = events_function(model, model.start, model.end, **params)
+            steps, path = collect(events, model.cols, stats=stats)
+            cache.put(key, steps, path, model.rows, model.cols)
+    except FILE_ERRORS as exc:  # reported as the error of this file alone
+        error = str(exc) if isinstance(exc, (OSError, ValueError)) else f"{type(exc).__name__}: {exc}"
+        return {"config": filename, "algorithm": algorithm, "error": error}
+    result = {
+        "config": filename,
+        "algorithm": algorithm,
+        "start": model.start,
+        "goal": model.end,
+        "Nodes visited": len(steps),
+        "Path length": len(path) if path else None,
+        "Path cost": path_cost(model, path) if path else None,
+        "path": path,
+        "cached": entry is not None,
+        "stats": stats.as_dict(),
+    }
+    if keep_steps:
+        result["steps"] = steps
+    return result
+
+
+def _solve_job(job, profile=None):
+    if profile is None:
+        return solve_config(*job)
+    profiler = RunProfiler(f"{os.path.basename(job[0])}-{job[1]}")
+    with profiler.profiling():
+        result = solve_config(*job)
+    result["profile"] = profiler.save(profile)
+    return result
+
+
+def solve_configs(files, algorithms=(DEFAULT_ALGORITHM,), params=None, keep_steps=False, max_workers=None,
+                  trace_memory=False, profile=None, cache_dir=None):
+    """Solve every file with every algorithm, in parallel processes.
+
+    :param max_workers: process count, defaults to ``os.cpu_count()``; 1
+        solves in this process.
+    :param profile: directory to save a cProfile ``.pstats`` per run to;
+        defaults to the PATHFINDING_PROFILE setting.
+    :param cache_dir: directory of a result cache shared by the workers
+        and kept between runs.
+    :return: result dicts from solve_config, in file then algorithm order.
+    """
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHM_EVENTS:
+            raise KeyError(f"Unknown algorithm: {algorithm}")
+    profile = profile or profile_directory()
+    jobs = [(filename, algorithm, params, keep_steps, trace_memory, cache_dir)
+            for filename in files for algorithm in algorithms]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(jobs) < 2:
+        return [_solve_job(job, profile) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return list(pool.map(_solve_job, jobs, [profile] * len(jobs)))
+
+
+def parse_param(text):
+    """``NAME=VALUE`` with VALUE read as JSON when it parses, else as text."""
+    name, separator, value = text.partition("=")
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve saved grid configurations without the GUI.")
+    parser.add_argument("configs", nargs="+", help="configuration files, directories or glob patterns")
+    parser.add_argument("--algorithms", nargs="+", metavar="NAME", default=[DEFAULT_ALGORITHM],
+                        help=f"algorithm names (default: {DEFAULT_ALGORITHM})")
+    parser.add_argument("--param", action="append", type=parse_param, default=[], metavar="NAME=VALUE",
+                        help="algorithm setting such as heuristic=octile, passed where accepted")
+    parser.add_argument("--steps", action="store_true", help="include the visit order of every run")
+    parser.add_argument("--workers", type=int, help="processes to solve in (default: CPU count)")
+    parser.add_argument("--memory", action="store_true", help="measure peak memory with tracemalloc (slower)")
+    parser.add_argument("--profile", metavar="DIR", help="save a cProfile .pstats per run to DIR")
+    parser.add_argument("--cache-dir", metavar="DIR", help="replay repeated runs from a result cache kept in DIR")
+    parser.add_argument("--output", "-o", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    files = config_files(args.configs)
+    if not files:
+        parser.error("no configuration files found")
+    try:
+        results = solve_configs(files, args.algorithms, dict(args.param), args.steps, args.workers,
+                                args.memory, args.profile, args.cache_dir)
+    except KeyError as exc:
+        parser.error(str(exc))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
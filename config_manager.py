@@ -1,22 +1,79 @@
 import json
-from PyQt5.QtWidgets import QFileDialog
+import os
+import zipfile
+from grid_model import CUT_NEVER, GridModel
+from q_learning import load_table, save_table, table_filename
+
+# The Qt file dialogs are imported where they are used, so configurations
+# can also be read headlessly (see cli.py).
+
+# What reading a saved configuration or its Q-table can raise for a bad
+# file: unreadable or invalid JSON, corrupt archives and malformed fields
+FILE_ERRORS = (OSError, ValueError, KeyError, TypeError, AttributeError, zipfile.BadZipFile)
 
 def save_config(grid_widget):
+    from PyQt5.QtWidgets import QFileDialog
     config = {
-        "grid": grid_widget.get_grid_data(),
+        "grid": grid_widget.model.to_list(),
         "start": grid_widget.start_point,
-        "end": grid_widget.end_point
+        "end": grid_widget.end_point,
+        "costs": grid_widget.model.costs_to_list(),
+        "connectivity": grid_widget.model.connectivity,
+        "corner_cutting": grid_widget.model.corner_cutting
     }
     filename, _ = QFileDialog.getSaveFileName(grid_widget, "Save Configuration", "", "JSON Files (*.json)")
     if filename:
         with open(filename, "w") as f:
             json.dump(config, f)
+        # Обученная Q-таблица (если есть) сохраняется рядом с конфигурацией
+        save_table(grid_widget.model, table_filename(filename))
 
 def load_config(grid_widget):
-    import json
-    from PyQt5.QtWidgets import QFileDialog
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox
     filename, _ = QFileDialog.getOpenFileName(None, "Load Configuration", "", "JSON Files (*.json)")
     if filename:
         with open(filename, "r") as f:
             config = json.load(f)
         grid_widget.load_from_config(config)
+        if os.path.exists(table_filename(filename)):
+            try:
+                load_table(grid_widget.model, table_filename(filename))
+            except FILE_ERRORS as exc:
+                # Сетка уже загружена; остаётся без сохранённой Q-таблицы
+                QMessageBox.warning(grid_widget, "Warning",
+                                    f"Cannot load the saved Q-table, Q-Learning starts from scratch: {exc}")
+
+def config_model(config):
+    """Build a GridModel, with its start and end, from a saved configuration.
+
+    Raises ValueError when ``config`` is not a JSON object, has no grid or
+    an endpoint lies off it.
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"Configuration must be a JSON object, not {type(config).__name__}")
+    grid = config.get("grid")
+    if not grid:
+        raise ValueError("Configuration has no grid")
+    model = GridModel.from_list(grid, config.get("start"), config.get("end"))
+    for name, point in (("start", model.start), ("end", model.end)):
+        if point is not None and (len(point) != 2 or not model.in_bounds(*point)):
+            raise ValueError(f"{name.capitalize()} {list(point)} is outside the {model.rows}x{model.cols} grid")
+    costs = config.get("costs")
+    if costs:
+        model.load_costs(costs)
+    model.set_movement(config.get("connectivity", 4), config.get("corner_cutting", CUT_NEVER))
+    return model
+
+def read_config(filename):
+    """Load a saved configuration file, and its Q-table if one was saved
+    next to it, without a GUI. Invalid configurations raise ValueError
+    naming the file."""
+    with open(filename, "r") as f:
+        config = json.load(f)
+    try:
+        model = config_model(config)
+    except ValueError as exc:
+        raise ValueError(f"{filename}: {exc}") from exc
+    if os.path.exists(table_filename(filename)):
+        load_table(model, table_filename(filename))
+    return model
@@ -0,0 +1,189 @@
+import heapq
+import weakref
+
+from grid_graph import grid_graph
+from grid_model import FREE, as_grid_model
+from instrumentation import recorded_phase
+
+# Keys are sums of float costs and km, so keys that should tie can differ in
+# the last bits; they are rounded to this many decimals and then compared
+# exactly, in the heap and in the termination check alike
+KEY_DIGITS = 9
+
+_planner_cache = weakref.WeakKeyDictionary()
+
+
+class DStarLite:
+    """D* Lite planner that keeps its search state between runs.
+
+    Searches backward from ``goal`` so the start can move freely. When
+    cells change, only the vertices whose edges touch them are updated and
+    the search resumes from there instead of starting over.
+    """
+
+    def __init__(self, model, goal):
+        self.goal = model.index(*goal)
+        self.reset(model)
+
+    def reset(self, model):
+        self.graph = grid_graph(model)
+        self.version = model.version
+        self.rows, self.cols = model.rows, model.cols
+        self.connectivity = model.connectivity
+        size = model.size
+        self.g = [float('inf')] * size
+        self.rhs = [float('inf')] * size
+        self.rhs[self.goal] = 0.0
+        self.queue = []
+        self.queued = {}  # vertex -> key of its live queue entry
+        self.km = 0.0
+        self.last = None  # start of the previous run
+        self.h = None     # heuristic towards that start
+
+    def insert(self, vertex, key):
+        self.queued[vertex] = key
+        heapq.heappush(self.queue, (key, vertex))
+
+    def top_key(self):
+        queue, queued = self.queue, self.queued
+        while queue and queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)  # stale entry
+        return queue[0][0] if queue else (float('inf'), float('inf'))
+
+    def key(self, vertex):
+        best = min(self.g[vertex], self.rhs[vertex])
+        return (round(best + self.h(vertex) + self.km, KEY_DIGITS), round(best, KEY_DIGITS))
+
+    def update_vertex(self, vertex):
+        if vertex != self.goal:
+            best = float('inf')
+            offsets, targets = self.graph.csr()
+            weights = self.graph.edge_weights()
+            g = self.g
+            for edge in range(offsets[vertex], offsets[vertex + 1]):
+                cost = weights[edge] + g[targets[edge]]
+                if cost < best:
+                    best = cost
+            self.rhs[vertex] = best
+        self.queued.pop(vertex, None)
+        if self.g[vertex] != self.rhs[vertex]:
+            self.insert(vertex, self.key(vertex))
+
+    def settled(self, vertex):
+        return self.top_key() >= self.key(vertex) and self.rhs[vertex] == self.g[vertex]
+
+    def compute_shortest_path(self, sources):
+        """Process queued vertices until every vertex in ``sources`` is
+        consistent; returns the vertices expanded, in order."""
+        offsets, targets = self.graph.csr()
+        g, rhs = self.g, self.rhs
+        expanded = []
+        while self.queue and not all(self.settled(source) for source in sources):
+            old_key, vertex = heapq.heappop(self.queue)
+            del self.queued[vertex]
+            new_key = self.key(vertex)
+            if old_key < new_key:
+                self.insert(vertex, new_key)
+                continue
+            expanded.append(vertex)
+            # Edges are symmetric between free cells, so the neighbours are
+            # also the predecessors.
+            predecessors = targets[offsets[vertex]:offsets[vertex + 1]]
+            if g[vertex] > rhs[vertex]:
+                g[vertex] = rhs[vertex]
+                for neighbor in predecessors:
+                    self.update_vertex(neighbor)
+            else:
+                g[vertex] = float('inf')
+                for neighbor in predecessors:
+                    self.update_vertex(neighbor)
+                self.update_vertex(vertex)
+        return expanded
+
+    def apply_changes(self, model):
+        """Patch the search for cells edited since the last run; returns
+        False when the edits cannot be patched and a reset is needed."""
+        changes = model.changes_since(self.version)
+        if changes is None or (model.rows, model.cols) != (self.rows, self.cols) \
+                or model.connectivity != self.connectivity:
+            return False
+        min_cost = self.graph.min_cost
+        self.graph = grid_graph(model)
+        self.version = model.version
+        if self.graph.min_cost < min_cost:
+            return False  # queued keys may now overestimate
+        rows, cols = self.rows, self.cols
+        touched = set()
+        for cell in changes:
+            i, j = divmod(cell, cols)
+            # Every edge into, out of or around the corner of ``cell`` starts
+            # within one step of it
+            for ni in range(max(0, i - 1), min(rows, i + 2)):
+                for nj in range(max(0, j - 1), min(cols, j + 2)):
+                    touched.add(ni * cols + nj)
+        for vertex in touched:
+            self.update_vertex(vertex)
+        return True
+
+    def plan(self, model, start, heuristic):
+        """Bring the search up to date and return ``(expanded, path)``.
+
+        ``heuristic(graph, cell)`` builds the estimate towards ``cell``, as
+        algorithms.goal_heuristic does. ``path`` holds flat cell ids from
+        start to goal and is empty when the goal cannot be reached.
+        """
+        source = model.index(*start)
+        if model.version != self.version and not self.apply_changes(model):
+            self.reset(model)
+        if self.h is None:
+            self.h = heuristic(self.graph, start)
+            self.insert(self.goal, self.key(self.goal))
+        elif source != self.last:
+            # Queued keys stay lower bounds once km absorbs the start's move
+            self.km += self.h(source)
+            self.h = heuristic(self.graph, start)
+        self.last = source
+        if model.walls[source] != FREE:
+            # A start on a wall has edges out but none in, so nothing ever
+            # updates it: settle its neighbours and read its cost off them
+            expanded = self.compute_shortest_path(self.graph.targets[
+                self.graph.offsets[source]:self.graph.offsets[source + 1]].tolist())
+            self.update_vertex(source)
+            self.queued.pop(source, None)
+            self.g[source] = self.rhs[source]
+        else:
+            expanded = self.compute_shortest_path((source,))
+        with recorded_phase("path reconstruction"):
+            path = self.extract_path(source)
+        return expanded, path
+
+    def extract_path(self, source):
+        g = self.g
+        if g[source] == float('inf'):
+            return []
+        offsets, targets = self.graph.csr()
+        weights = self.graph.edge_weights()
+        path = [source]
+        current = source
+        for _ in range(self.graph.size):
+            if current == self.goal:
+                return path
+            best, step = float('inf'), None
+            for edge in range(offsets[current], offsets[current + 1]):
+                cost = weights[edge] + g[targets[edge]]
+                if cost < best:
+                    best, step = cost, targets[edge]
+            if step is None:
+                return []
+            path.append(step)
+            current = step
+        return []
+
+
+def dstar_planner(grid, goal):
+    """Return the planner kept for ``grid``, starting over if the goal moved."""
+    model = as_grid_model(grid)
+    planner = _planner_cache.get(model)
+    if planner is None or planner.goal != model.index(*goal):
+        planner = _planner_cache[model] = DStarLite(model, goal)
+    return planner
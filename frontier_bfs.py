@@ -0,0 +1,98 @@
+import numpy as np
+
+from grid_graph import grid_graph
+from grid_model import FREE, as_grid_model
+
+# Frontiers larger than this fraction of the grid are grown with whole-grid
+# shifted masks; smaller ones gather neighbours from the adjacency index.
+DENSE_FRONTIER_RATIO = 1 / 32
+
+
+def iter_levels(grid, start, goal=None):
+    """Level-synchronous BFS that grows the whole frontier at once.
+
+    Yields ``(level, distance)`` per depth: ``level`` is an ``int32`` array of
+    the flat ids first reached at that depth (in row-major order) and
+    ``distance`` is the ``(rows, cols)`` ``int32`` field filled so far, with
+    ``-1`` for cells not reached yet. When ``goal`` is given the search stops
+    after the level containing it.
+    """
+    model = as_grid_model(grid)
+    rows, cols = model.rows, model.cols
+    graph = grid_graph(model)
+    moves = graph.moves.reshape(graph.size, len(graph.directions))
+    free = model.walls.reshape(rows, cols) == FREE
+
+    distance = np.full(rows * cols, -1, dtype=np.int32)
+    field = distance.reshape(rows, cols)
+    source = graph.index(start)
+    target = graph.index(goal) if goal is not None else -1
+    distance[source] = 0
+    frontier = np.array([source], dtype=np.int32)
+    yield frontier, field
+    # Shifted masks only cover the four orthogonal moves
+    dense_limit = max(1, int(graph.size * DENSE_FRONTIER_RATIO)) if graph.connectivity == 4 else graph.size + 1
+    depth = 0
+
+    while frontier.size:
+        if target >= 0 and distance[target] >= 0:
+            break
+        depth += 1
+        if frontier.size >= dense_limit:
+            mask = np.zeros(rows * cols, dtype=bool)
+            mask[frontier] = True
+            mask = mask.reshape(rows, cols)
+            grown = np.zeros_like(mask)
+            grown[:-1, :] |= mask[1:, :]
+            grown[1:, :] |= mask[:-1, :]
+            grown[:, :-1] |= mask[:, 1:]
+            grown[:, 1:] |= mask[:, :-1]
+            grown &= free
+            grown = grown.reshape(-1)
+            grown &= distance < 0
+            frontier = np.flatnonzero(grown).astype(np.int32)
+        else:
+            candidates = moves[frontier].reshape(-1)
+            candidates = candidates[candidates >= 0]
+            frontier = np.unique(candidates[distance[candidates] < 0])
+        if not frontier.size:
+            break
+        distance[frontier] = depth
+        yield frontier, field
+
+
+def bfs_levels(grid, start, goal=None):
+    """Run iter_levels() to completion.
+
+    Returns ``(levels, distance)`` where ``levels[d]`` holds the ids at depth
+    ``d`` and ``distance`` is the final field.
+    """
+    levels = []
+    distance = None
+    for level, distance in iter_levels(grid, start, goal):
+        levels.append(level)
+    return levels, distance
+
+
+def distance_field(grid, source):
+    """BFS distance from ``source`` to every cell (``-1`` when unreachable)."""
+    return bfs_levels(grid, source)[1]
+
+
+def path_from_distance(grid, distance, goal):
+    """Walk the distance field downhill from ``goal`` back to the source."""
+    graph = grid_graph(grid)
+    offsets, targets = graph.csr()
+    flat = memoryview(distance.reshape(-1))
+    current = graph.index(goal)
+    if flat[current] < 0:
+        return []
+    path = [goal]
+    while flat[current] > 0:
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if flat[neighbor] == flat[current] - 1:
+                current = neighbor
+                break
+        path.append(graph.coords(current))
+    path.reverse()
+    return path
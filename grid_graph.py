@@ -0,0 +1,106 @@
+import math
+import weakref
+
+import numpy as np
+
+from grid_model import CUT_ALWAYS, CUT_NEVER, FREE, as_grid_model
+
+# Neighbour order used by every search: up, down, left, right, and under
+# 8-connectivity the diagonals after them.
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONALS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+_graph_cache = weakref.WeakKeyDictionary()
+
+
+def _shifted(rows, cols, di, dj):
+    # Slices pairing each cell with its neighbour at (di, dj), both in bounds
+    src = (slice(max(0, -di), rows - max(0, di)), slice(max(0, -dj), cols - max(0, dj)))
+    dst = (slice(max(0, di), rows - max(0, -di)), slice(max(0, dj), cols - max(0, -dj)))
+    return src, dst
+
+
+class GridGraph:
+    """CSR adjacency index over flat cell ids (``i * cols + j``).
+
+    ``targets[offsets[u]:offsets[u + 1]]`` lists the free neighbours of ``u``
+    in ``directions`` order; ``weights`` holds the matching edge costs and
+    ``lengths`` the step lengths (1 or sqrt(2)) they were scaled by.
+    ``reverse_weights`` holds the cost of each edge walked the other way,
+    for searches that run backwards from the goal.
+    ``moves[u * len(directions) + k]`` is the cell reached from ``u`` in
+    direction ``k``, or ``-1`` when that move is blocked.
+    """
+
+    def __init__(self, model):
+        rows, cols = model.rows, model.cols
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.version = model.version
+        self.connectivity = model.connectivity
+        self.directions = DIRECTIONS if model.connectivity == 4 else DIRECTIONS + DIAGONALS
+
+        free = model.walls.reshape(rows, cols) == FREE
+        ids = np.arange(self.size, dtype=np.int32).reshape(rows, cols)
+        moves = np.full((rows, cols, len(self.directions)), -1, dtype=np.int32)
+        for k, (di, dj) in enumerate(self.directions):
+            src, dst = _shifted(rows, cols, di, dj)
+            allowed = free[dst].copy()
+            if di and dj and model.corner_cutting != CUT_ALWAYS:
+                # Orthogonal cells the diagonal step passes between
+                vertical = free[dst[0], src[1]]
+                horizontal = free[src[0], dst[1]]
+                if model.corner_cutting == CUT_NEVER:
+                    allowed &= vertical & horizontal
+                else:
+                    allowed &= vertical | horizontal
+            moves[src + (k,)] = np.where(allowed, ids[dst], -1)
+        self.moves = moves.reshape(-1)
+
+        valid = self.moves.reshape(self.size, len(self.directions)) >= 0
+        self.offsets = np.zeros(self.size + 1, dtype=np.int32)
+        np.cumsum(valid.sum(axis=1), out=self.offsets[1:])
+        self.targets = np.ascontiguousarray(self.moves[valid.reshape(-1)])
+
+        lengths = np.array([math.sqrt(2) if di and dj else 1.0 for di, dj in self.directions])
+        self.lengths = np.broadcast_to(lengths, valid.shape)[valid]
+        costs = model.costs.astype(np.float64)
+        self.weights = costs[self.targets] * self.lengths
+        sources = np.repeat(np.arange(self.size), np.diff(self.offsets))
+        self.reverse_weights = costs[sources] * self.lengths
+        free_costs = costs[model.walls == FREE]
+        self.min_cost = float(free_costs.min()) if free_costs.size else 1.0
+        self.uniform = self.connectivity == 4 and bool(np.all(free_costs == 1.0))
+
+    def index(self, cell):
+        return cell[0] * self.cols + cell[1]
+
+    def coords(self, index):
+        return divmod(index, self.cols)
+
+    def csr(self):
+        """Zero-copy ``(offsets, targets)`` views for hot loops."""
+        return memoryview(self.offsets), memoryview(self.targets)
+
+    def edge_weights(self):
+        """Zero-copy view of ``weights``, aligned with ``targets``."""
+        return memoryview(self.weights)
+
+    def reverse_edge_weights(self):
+        """Zero-copy view of ``reverse_weights``, aligned with ``targets``."""
+        return memoryview(self.reverse_weights)
+
+    def degree(self, index):
+        return int(self.offsets[index + 1] - self.offsets[index])
+
+
+def grid_graph(grid):
+    """Return the adjacency index for ``grid``, rebuilding it only when the
+    model's version has changed since the last call."""
+    model = as_grid_model(grid)
+    graph = _graph_cache.get(model)
+    if graph is None or graph.version != model.version:
+        graph = GridGraph(model)
+        _graph_cache[model] = graph
+    return graph
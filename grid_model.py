@@ -0,0 +1,166 @@
+import numpy as np
+
+FREE = 0
+WALL = 1
+
+# Corner-cutting rules for diagonal moves under 8-connectivity
+CUT_NEVER = "never"        # both orthogonal neighbours must be free
+CUT_ONE_WALL = "one-wall"  # may pass one wall corner, but not squeeze between two
+CUT_ALWAYS = "always"      # diagonals ignore the orthogonal neighbours
+CORNER_RULES = (CUT_NEVER, CUT_ONE_WALL, CUT_ALWAYS)
+
+# Cell edits remembered for changes_since(); older history is dropped
+CHANGE_LOG_LIMIT = 4096
+
+
+class GridModel:
+    """Grid state shared by the widget, the algorithms and the file formats.
+
+    Walls are kept in a flat ``uint8`` array and traversal costs in a flat
+    ``float32`` array, both indexed by ``i * cols + j``. ``version`` is bumped
+    on every mutation so derived data can tell when it is out of date, and
+    changes_since() tells which cells changed, so it can be patched instead.
+    Entering a cell costs its traversal cost, times sqrt(2) for a diagonal
+    step; ``connectivity`` (4 or 8) and ``corner_cutting`` set the moves.
+    """
+
+    def __init__(self, rows, cols, walls=None, costs=None, start=None, end=None,
+                 connectivity=4, corner_cutting=CUT_NEVER):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        self.walls = np.zeros(size, dtype=np.uint8) if walls is None else walls
+        self.costs = np.ones(size, dtype=np.float32) if costs is None else costs
+        self.start = tuple(start) if start else None
+        self.end = tuple(end) if end else None
+        self.connectivity = connectivity
+        self.corner_cutting = corner_cutting
+        self.version = 0
+        self.change_log = []  # (version, cell index or None for the whole grid)
+        self.log_floor = 0    # earliest version the log can answer for
+
+    @classmethod
+    def from_list(cls, grid, start=None, end=None):
+        """Build a model from the legacy ``list[list[int]]`` representation."""
+        rows = len(grid)
+        cols = len(grid[0]) if rows else 0
+        walls = np.asarray(grid, dtype=np.uint8).reshape(rows * cols)
+        return cls(rows, cols, walls=np.ascontiguousarray(walls), start=start, end=end)
+
+    def to_list(self):
+        return self.walls.reshape(self.rows, self.cols).tolist()
+
+    def copy(self):
+        model = GridModel(self.rows, self.cols, self.walls.copy(), self.costs.copy(), self.start, self.end,
+                          self.connectivity, self.corner_cutting)
+        model.version = model.log_floor = self.version
+        return model
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, i, j):
+        return i * self.cols + j
+
+    def coords(self, index):
+        return divmod(index, self.cols)
+
+    def in_bounds(self, i, j):
+        return 0 <= i < self.rows and 0 <= j < self.cols
+
+    def flat_walls(self):
+        """Zero-copy view of the wall array for tight Python loops."""
+        return memoryview(self.walls)
+
+    def is_wall(self, i, j):
+        return self.walls[i * self.cols + j] == WALL
+
+    def set_wall(self, i, j, wall=True):
+        index = i * self.cols + j
+        value = WALL if wall else FREE
+        if self.walls[index] != value:
+            self.walls[index] = value
+            self.changed(index)
+
+    def toggle_wall(self, i, j):
+        self.set_wall(i, j, not self.is_wall(i, j))
+
+    def set_cost(self, i, j, cost):
+        index = i * self.cols + j
+        if self.costs[index] != cost:
+            self.costs[index] = cost
+            self.changed(index)
+
+    def cost(self, i, j):
+        return float(self.costs[i * self.cols + j])
+
+    def costs_to_list(self):
+        return self.costs.reshape(self.rows, self.cols).tolist()
+
+    def load_walls(self, walls):
+        walls = np.asarray(walls, dtype=np.uint8).reshape(-1)
+        self.changed_cells(np.flatnonzero(self.walls != walls))
+        self.walls[:] = walls
+
+    def load_costs(self, costs):
+        costs = np.asarray(costs, dtype=np.float32).reshape(-1)
+        self.changed_cells(np.flatnonzero(self.costs != costs))
+        self.costs[:] = costs
+
+    def set_movement(self, connectivity=None, corner_cutting=None):
+        if connectivity is not None and connectivity not in (4, 8):
+            raise ValueError(f"Unsupported connectivity: {connectivity}")
+        if corner_cutting is not None and corner_cutting not in CORNER_RULES:
+            raise ValueError(f"Unknown corner-cutting rule: {corner_cutting}")
+        connectivity = connectivity or self.connectivity
+        corner_cutting = corner_cutting or self.corner_cutting
+        if (connectivity, corner_cutting) != (self.connectivity, self.corner_cutting):
+            self.connectivity = connectivity
+            self.corner_cutting = corner_cutting
+            self.changed()
+
+    def clear(self):
+        self.walls[:] = FREE
+        self.costs[:] = 1.0
+        self.start = None
+        self.end = None
+        self.changed()
+
+    def changed(self, index=None):
+        """Bump the version and log the edited cell (``None``: everything)."""
+        self.version += 1
+        self.change_log.append((self.version, index))
+        if len(self.change_log) > CHANGE_LOG_LIMIT:
+            drop = len(self.change_log) // 2
+            self.log_floor = self.change_log[drop - 1][0]
+            del self.change_log[:drop]
+
+    def changed_cells(self, indices):
+        # Bulk edits log each cell while that stays cheap, else the whole grid
+        if len(indices) > CHANGE_LOG_LIMIT // 4:
+            self.changed()
+        else:
+            for index in indices:
+                self.changed(int(index))
+
+    def changes_since(self, version):
+        """Flat indices of cells edited after ``version``, or ``None`` when
+        the log cannot tell (whole-grid edits or history already dropped)."""
+        if version < self.log_floor:
+            return None
+        cells = set()
+        for logged, index in reversed(self.change_log):
+            if logged <= version:
+                break
+            if index is None:
+                return None
+            cells.add(index)
+        return cells
+
+
+def as_grid_model(grid):
+    """Accept either a ``GridModel`` or a nested list grid."""
+    if isinstance(grid, GridModel):
+        return grid
+    return GridModel.from_list(grid)
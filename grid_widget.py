@@ -1,111 +1,273 @@
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsRectItem
-from PyQt5.QtGui import QBrush, QColor, QTransform
-from PyQt5.QtCore import Qt
+from contextlib import contextmanager
+
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt5.QtGui import QColor, QImage, QPen
+from PyQt5.QtCore import Qt, QLineF, QRectF
 from undo_redo import UndoRedoManager
+from grid_model import CUT_NEVER, GridModel
 
 CELL_SIZE = 30
 GRID_ROWS = 20
 GRID_COLS = 20
 
+# Линии сетки рисуются, только если ячейка на экране не меньше этого размера
+MIN_GRID_LINE_PIXELS = 6
+
+FREE_RGB = QColor(Qt.white).rgb()
+WALL_RGB = QColor(Qt.black).rgb()
+START_RGB = QColor(Qt.green).rgb()
+END_RGB = QColor(Qt.red).rgb()
+
+# Свободные клетки окрашиваются по стоимости: дороже — темнее, дешевле — голубее
+EXPENSIVE_RGB = (150, 100, 50)
+CHEAP_RGB = (170, 215, 255)
+SHADED_COST_RANGE = 10.0  # стоимость, при которой оттенок насыщается
+
+
+def cost_rgb(costs):
+    """Map an array of traversal costs to packed RGB32 colours."""
+    costs = np.asarray(costs, dtype=np.float64)
+    shade = np.clip(np.log(np.maximum(costs, 1e-6)) / np.log(SHADED_COST_RANGE), -1.0, 1.0)
+    rgb = np.full(costs.shape, FREE_RGB, dtype=np.uint32)
+    for mask, target, weight in ((shade > 0, EXPENSIVE_RGB, shade), (shade < 0, CHEAP_RGB, -shade)):
+        if mask.any():
+            w = weight[mask]
+            channels = [np.round(255 + (value - 255) * w).astype(np.uint32) for value in target]
+            rgb[mask] = 0xFF000000 | (channels[0] << 16) | (channels[1] << 8) | channels[2]
+    return rgb
+
+
+class GridRasterItem(QGraphicsItem):
+    """Draws the whole grid from one QImage holding a pixel per cell."""
+
+    def __init__(self, image, rows, cols, cell_size):
+        super().__init__()
+        self.image = image
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.grid_pen = QPen(Qt.gray, 0)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self.cols * self.cell_size, self.rows * self.cell_size)
+
+    def paint(self, painter, option, widget=None):
+        size = self.cell_size
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        left = int(exposed.left() // size)
+        top = int(exposed.top() // size)
+        right = min(self.cols, int(exposed.right() // size) + 1)
+        bottom = min(self.rows, int(exposed.bottom() // size) + 1)
+        target = QRectF(left * size, top * size, (right - left) * size, (bottom - top) * size)
+        painter.drawImage(target, self.image, QRectF(left, top, right - left, bottom - top))
+
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if size * scale >= MIN_GRID_LINE_PIXELS:
+            painter.setPen(self.grid_pen)
+            lines = [QLineF(j * size, top * size, j * size, bottom * size) for j in range(left, right + 1)]
+            lines += [QLineF(left * size, i * size, right * size, i * size) for i in range(top, bottom + 1)]
+            painter.drawLines(lines)
+
+
 class GridWidget(QGraphicsView):
     def __init__(self):
         super().__init__()
         self.scene = QGraphicsScene(self)
         self.setScene(self.scene)
-        self.cells = {}  # Ключ: (i, j) -> QGraphicsRectItem
-        self.start_point = None
-        self.end_point = None
+        self.model = GridModel(GRID_ROWS, GRID_COLS)
+        self.pixels = None  # (rows, cols) uint32 RGB-буфер, общий с QImage
+        self.image = None
+        self.raster = None
+        self.dirty = None
+        self.batch_depth = 0
         self.mode = "wall"  # Режим по умолчанию
+        self.brush_cost = 5.0  # стоимость, которую ставит режим "cost"
+        # Снимается, пока поиск в рабочем потоке читает модель
+        self.editable = True
         self.undo_redo_stack = UndoRedoManager(self)
         self.init_grid()
         self.setDragMode(QGraphicsView.ScrollHandDrag)  # Для панорамирования
 
+    @property
+    def start_point(self):
+        return self.model.start
+
+    @start_point.setter
+    def start_point(self, point):
+        self.model.start = point
+
+    @property
+    def end_point(self):
+        return self.model.end
+
+    @end_point.setter
+    def end_point(self, point):
+        self.model.end = point
+
     def init_grid(self):
         self.scene.clear()
-        self.cells = {}
-        for i in range(GRID_ROWS):
-            for j in range(GRID_COLS):
-                rect = QGraphicsRectItem(j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                rect.setBrush(QBrush(Qt.white))
-                rect.setPen(Qt.gray)
-                self.scene.addItem(rect)
-                self.cells[(i, j)] = rect
+        if (self.model.rows, self.model.cols) != (GRID_ROWS, GRID_COLS):
+            self.model = GridModel(GRID_ROWS, GRID_COLS, connectivity=self.model.connectivity,
+                                   corner_cutting=self.model.corner_cutting)
+        self.pixels = np.empty((GRID_ROWS, GRID_COLS), dtype=np.uint32)
+        self.image = QImage(self.pixels.data, GRID_COLS, GRID_ROWS, GRID_COLS * 4, QImage.Format_RGB32)
+        self.raster = GridRasterItem(self.image, GRID_ROWS, GRID_COLS, CELL_SIZE)
+        self.scene.addItem(self.raster)
+        self.scene.setSceneRect(self.raster.boundingRect())
+        self.render_model()
+
+    def render_model(self):
+        """Repaint every cell from the model, dropping animation colours."""
+        model = self.model
+        free_rgb = cost_rgb(model.costs) if np.any(model.costs != 1) else FREE_RGB
+        self.pixels[:] = np.where(model.walls, WALL_RGB, free_rgb).reshape(model.rows, model.cols)
+        if model.start is not None:
+            self.pixels[model.start] = START_RGB
+        if model.end is not None:
+            self.pixels[model.end] = END_RGB
+        self.raster.update()
+
+    def model_rgb(self, i, j):
+        if (i, j) == self.model.start:
+            return START_RGB
+        if (i, j) == self.model.end:
+            return END_RGB
+        if self.model.is_wall(i, j):
+            return WALL_RGB
+        return int(cost_rgb(self.model.cost(i, j)))
+
+    def cell_color(self, i, j):
+        return QColor.fromRgb(int(self.pixels[i, j]))
+
+    def set_cell_color(self, cell, color):
+        """Colour one cell; the repaint is deferred while a batch is open."""
+        i, j = cell
+        self.pixels[i, j] = color.rgb()
+        if self.batch_depth:
+            if self.dirty is None:
+                self.dirty = [i, j, i, j]
+            else:
+                dirty = self.dirty
+                dirty[0] = min(dirty[0], i)
+                dirty[1] = min(dirty[1], j)
+                dirty[2] = max(dirty[2], i)
+                dirty[3] = max(dirty[3], j)
+        else:
+            self.update_cells(i, j, i, j)
+
+    def refresh_cell(self, i, j):
+        self.pixels[i, j] = self.model_rgb(i, j)
+        self.update_cells(i, j, i, j)
+
+    def update_cells(self, top, left, bottom, right):
+        size = CELL_SIZE
+        self.raster.update(QRectF(left * size, top * size, (right - left + 1) * size, (bottom - top + 1) * size))
+
+    @contextmanager
+    def batch_update(self):
+        """Collect cell colour changes and repaint their bounding rect once."""
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth and self.dirty is not None:
+                self.update_cells(*self.dirty)
+                self.dirty = None
 
     def mousePressEvent(self, event):
         pos = self.mapToScene(event.pos())
         j = int(pos.x() // CELL_SIZE)
         i = int(pos.y() // CELL_SIZE)
-        if (i, j) in self.cells:
+        if self.editable and self.model.in_bounds(i, j):
             # Запоминаем действие для undo/redo
-            self.undo_redo_stack.record_state((i, j), self.cells[(i, j)].brush().color())
+            self.undo_redo_stack.record_state((i, j), self.cell_color(i, j))
             if self.mode == "wall":
-                current_color = self.cells[(i, j)].brush().color()
-                if current_color == QColor(Qt.white):
-                    self.cells[(i, j)].setBrush(QBrush(Qt.black))
+                if (i, j) == self.start_point:
+                    self.start_point = None
+                elif (i, j) == self.end_point:
+                    self.end_point = None
                 else:
-                    self.cells[(i, j)].setBrush(QBrush(Qt.white))
+                    self.model.toggle_wall(i, j)
+                self.refresh_cell(i, j)
             elif self.mode == "start":
-                if self.start_point is not None:
-                    self.cells[self.start_point].setBrush(QBrush(Qt.white))
-                self.cells[(i, j)].setBrush(QBrush(Qt.green))
+                previous = self.start_point
+                self.model.set_wall(i, j, False)
                 self.start_point = (i, j)
+                if previous is not None:
+                    self.refresh_cell(*previous)
+                self.refresh_cell(i, j)
             elif self.mode == "end":
-                if self.end_point is not None:
-                    self.cells[self.end_point].setBrush(QBrush(Qt.white))
-                self.cells[(i, j)].setBrush(QBrush(Qt.red))
+                previous = self.end_point
+                self.model.set_wall(i, j, False)
                 self.end_point = (i, j)
+                if previous is not None:
+                    self.refresh_cell(*previous)
+                self.refresh_cell(i, j)
+            elif self.mode == "cost":
+                # Повторный клик той же стоимостью возвращает обычную стоимость 1
+                cost = 1.0 if self.model.cost(i, j) == self.brush_cost else self.brush_cost
+                self.model.set_cost(i, j, cost)
+                self.refresh_cell(i, j)
             # Режим Free Draw для сложных препятствий (будет переключаться через настройки)
             # TODO: Реализовать свободное рисование
         super().mousePressEvent(event)
 
     def get_grid_data(self):
-        grid = []
-        for i in range(GRID_ROWS):
-            row = []
-            for j in range(GRID_COLS):
-                color = self.cells[(i, j)].brush().color()
-                row.append(1 if color == QColor(Qt.black) else 0)
-            grid.append(row)
-        return grid
+        """Return the grid model; algorithms read it directly, without copying."""
+        return self.model
 
     def reset_grid(self):
-        self.start_point = None
-        self.end_point = None
+        self.model.clear()
         self.init_grid()
 
+    def current_settings(self):
+        """Grid values of the settings dialog, read from the current model."""
+        return {
+            "rows": self.model.rows,
+            "cols": self.model.cols,
+            "cell_size": CELL_SIZE,
+            "cost_brush": self.brush_cost,
+            "connectivity": self.model.connectivity,
+            "corner_cutting": self.model.corner_cutting,
+        }
+
     def apply_settings(self, settings):
         # Пример применения настроек из диалога: изменение размеров, цвета, темы
         global GRID_ROWS, GRID_COLS, CELL_SIZE
         GRID_ROWS = settings.get("rows", GRID_ROWS)
         GRID_COLS = settings.get("cols", GRID_COLS)
         CELL_SIZE = settings.get("cell_size", CELL_SIZE)
+        self.brush_cost = settings.get("cost_brush", self.brush_cost)
         self.init_grid()
+        self.model.set_movement(settings.get("connectivity"), settings.get("corner_cutting"))
 
     def clear_animation_highlights(self):
         """Clear all animation highlights while preserving walls, start, and end points."""
-        for (i, j), cell in self.cells.items():
-            current_color = cell.brush().color()
-            # Reset cells that are yellow (animation highlights) or blue (path highlights)
-            if current_color == QColor("yellow") or current_color == QColor("blue"):
-                cell.setBrush(QBrush(Qt.white))
+        self.render_model()
 
     def load_from_config(self, config):
         grid = config.get("grid")
-        start = tuple(config.get("start", ()))
-        end = tuple(config.get("end", ()))
+        start = tuple(config.get("start") or ())
+        end = tuple(config.get("end") or ())
         if grid:
-            for i, row in enumerate(grid):
-                for j, val in enumerate(row):
-                    if val == 1:
-                        self.cells[(i, j)].setBrush(QBrush(Qt.black))
-                    else:
-                        self.cells[(i, j)].setBrush(QBrush(Qt.white))
+            model = GridModel.from_list(grid)
+            if (model.rows, model.cols) != (GRID_ROWS, GRID_COLS):
+                self.apply_settings({"rows": model.rows, "cols": model.cols})
+            self.model.load_walls(model.walls)
+            costs = config.get("costs")
+            self.model.load_costs(costs if costs else np.ones(self.model.size, dtype=np.float32))
+            self.model.set_movement(config.get("connectivity", 4), config.get("corner_cutting", CUT_NEVER))
         if start:
             self.start_point = start
-            self.cells[start].setBrush(QBrush(Qt.green))
         if end:
             self.end_point = end
-            self.cells[end].setBrush(QBrush(Qt.red))
+        self.clear_animation_highlights()
+
     def wheelEvent(self, event):
         zoom_in_factor = 1.25
         zoom_out_factor = 1 / zoom_in_factor
@@ -0,0 +1,363 @@
+import heapq
+import math
+import weakref
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from grid_graph import grid_graph
+from grid_model import CUT_ALWAYS, FREE, as_grid_model
+from instrumentation import recorded_phase
+
+DEFAULT_CLUSTER_SIZE = 16
+# Entrances at least this wide get a transition at each end instead of a
+# single one in the middle.
+WIDE_ENTRANCE = 6
+# Searches from query endpoints to their cluster's entrances kept for reuse
+ENDPOINT_CACHE_SIZE = 512
+
+_hierarchy_cache = weakref.WeakKeyDictionary()
+
+
+class ClusterHierarchy:
+    """HPA* abstraction of a grid model.
+
+    The grid is cut into square clusters. Every free run along a border
+    between two clusters becomes one or two transitions, i.e. pairs of
+    entrance cells facing each other; entrances of the same cluster are
+    linked by their cost inside the cluster. Only the clusters touched by
+    cell edits are recomputed when the model changes.
+    """
+
+    def __init__(self, model, cluster_size=DEFAULT_CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        self.rebuild(model)
+
+    def rebuild(self, model):
+        size = self.cluster_size
+        self.graph = grid_graph(model)
+        self.version = model.version
+        self.rows, self.cols = model.rows, model.cols
+        self.cluster_rows = -(-self.rows // size)
+        self.cluster_cols = -(-self.cols // size)
+        i, j = np.divmod(np.arange(self.rows * self.cols, dtype=np.int32), self.cols)
+        self.owners = (i // size) * self.cluster_cols + j // size
+        self.owner = memoryview(self.owners)
+        self.walls = memoryview(model.walls)
+        self.costs = memoryview(model.costs)
+        # Diagonal steps squeezing between two wall corners can be the only
+        # way across a border; every other diagonal crossing has an
+        # orthogonal one next to it.
+        self.squeeze = model.connectivity == 8 and model.corner_cutting == CUT_ALWAYS
+        self.transitions = {}  # border (cluster, cluster) -> [(cell, cell across)]
+        self.entrances = {}    # cluster -> set of its entrance cells
+        self.inter = {}        # entrance -> {entrance across a border: cost}
+        self.intra = {}        # entrance -> {entrance in the same cluster: cost}
+        self.paths = {}        # cluster -> {(entrance, entrance): cell path}
+        self.endpoints = OrderedDict()  # (cell, reverse) -> search(), LRU
+        clusters = range(self.cluster_rows * self.cluster_cols)
+        for border in self.borders(clusters):
+            self.build_border(border)
+        for cluster in clusters:
+            self.build_cluster(cluster)
+        self.rebuilt_clusters = len(clusters)
+
+    def update(self, model):
+        """Catch up with edits made to ``model`` since the last update."""
+        if model.version == self.version:
+            return
+        changes = model.changes_since(self.version)
+        if changes is None or (model.rows, model.cols) != (self.rows, self.cols):
+            self.rebuild(model)
+            return
+        self.graph = grid_graph(model)
+        self.version = model.version
+        dirty = {self.owner[cell] for cell in changes}
+        borders = set()
+        for cell in changes:
+            borders.update(self.cell_borders(cell))
+        for border in borders:
+            self.build_border(border)
+        for cluster in dirty:
+            self.build_cluster(cluster)
+        # Neighbours only need new intra edges if their entrances moved
+        rebuilt = len(dirty)
+        for border in borders:
+            for cluster in border:
+                if cluster not in dirty and self.collect_entrances(cluster) != self.entrances[cluster]:
+                    self.build_cluster(cluster)
+                    dirty.add(cluster)
+                    rebuilt += 1
+        self.rebuilt_clusters = rebuilt
+
+    def bounds(self, cluster):
+        ci, cj = divmod(cluster, self.cluster_cols)
+        size = self.cluster_size
+        return ci * size, cj * size, min((ci + 1) * size, self.rows), min((cj + 1) * size, self.cols)
+
+    def neighbours(self, cluster):
+        ci, cj = divmod(cluster, self.cluster_cols)
+        if ci > 0:
+            yield cluster - self.cluster_cols
+        if ci < self.cluster_rows - 1:
+            yield cluster + self.cluster_cols
+        if cj > 0:
+            yield cluster - 1
+        if cj < self.cluster_cols - 1:
+            yield cluster + 1
+
+    def borders(self, clusters):
+        return {(min(a, b), max(a, b)) for a in clusters for b in self.neighbours(a)}
+
+    def cell_borders(self, cell):
+        # Borders whose transitions can involve ``cell``
+        cluster = self.owner[cell]
+        top, left, bottom, right = self.bounds(cluster)
+        i, j = divmod(cell, self.cols)
+        for other in self.neighbours(cluster):
+            oi, oj = divmod(other, self.cluster_cols)
+            ci, cj = divmod(cluster, self.cluster_cols)
+            if (oi < ci and i == top) or (oi > ci and i == bottom - 1) \
+                    or (oj < cj and j == left) or (oj > cj and j == right - 1):
+                yield (min(cluster, other), max(cluster, other))
+
+    def build_border(self, border):
+        inter = self.inter
+        for u, v in self.transitions.pop(border, ()):
+            for a, b in ((u, v), (v, u)):
+                edges = inter.get(a)
+                if edges is not None:
+                    edges.pop(b, None)
+                    if not edges:
+                        del inter[a]
+        a, b = border
+        top, left, bottom, right = self.bounds(a)
+        cols = self.cols
+        walls = self.walls
+        if b - a == self.cluster_cols:  # b is below a
+            pairs = [((bottom - 1) * cols + j, bottom * cols + j) for j in range(left, right)]
+        else:                           # b is to the right of a
+            pairs = [(i * cols + right - 1, i * cols + right) for i in range(top, bottom)]
+        transitions = []
+        run = []
+        for u, v in pairs + [(None, None)]:
+            if u is not None and walls[u] == FREE and walls[v] == FREE:
+                run.append((u, v))
+                continue
+            if len(run) >= WIDE_ENTRANCE:
+                transitions += [run[0], run[-1]]
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+        costs = self.costs
+        for u, v in transitions:
+            inter.setdefault(u, {})[v] = float(costs[v])
+            inter.setdefault(v, {})[u] = float(costs[u])
+        if self.squeeze:
+            for k in range(len(pairs) - 1):
+                (u, v), (next_u, next_v) = pairs[k], pairs[k + 1]
+                for a_cell, b_cell, a_side, b_side in ((u, next_v, next_u, v), (next_u, v, u, next_v)):
+                    if walls[a_cell] == FREE and walls[b_cell] == FREE and walls[a_side] != FREE \
+                            and walls[b_side] != FREE:
+                        transitions.append((a_cell, b_cell))
+                        inter.setdefault(a_cell, {})[b_cell] = float(costs[b_cell]) * math.sqrt(2)
+                        inter.setdefault(b_cell, {})[a_cell] = float(costs[a_cell]) * math.sqrt(2)
+        self.transitions[border] = transitions
+
+    def collect_entrances(self, cluster):
+        owner = self.owner
+        return {cell for border in self.borders((cluster,)) for pair in self.transitions.get(border, ())
+                for cell in pair if owner[cell] == cluster}
+
+    def build_cluster(self, cluster):
+        for cell in self.entrances.get(cluster, ()):
+            self.intra.pop(cell, None)
+        entrances = self.collect_entrances(cluster)
+        self.entrances[cluster] = entrances
+        self.paths.pop(cluster, None)
+        for key in [key for key in self.endpoints if self.owner[key[0]] == cluster]:
+            del self.endpoints[key]
+        for cell in entrances:
+            distance, _ = self.search(cell, cluster, entrances)
+            self.intra[cell] = {other: cost for other, cost in distance.items() if other in entrances and other != cell}
+
+    def search(self, source, cluster, goals=(), reverse=False):
+        """Dijkstra confined to ``cluster``.
+
+        Returns ``(distance, tree)`` over the settled cells; ``tree`` maps
+        each cell to its predecessor, or with ``reverse`` to its successor
+        on the way to ``source`` (distances are then costs to ``source``).
+        Stops early once every cell in ``goals`` is settled.
+        """
+        if self.graph.uniform:
+            return self.breadth_first(source, cluster, goals)
+        offsets, targets = self.graph.csr()
+        weights = self.graph.edge_weights()
+        lengths = memoryview(self.graph.lengths)
+        owner = self.owner
+        costs = self.costs
+        remaining = set(goals)
+        distance = {}
+        tree = {source: None}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            cost, current = heapq.heappop(heap)
+            if current in distance:
+                continue
+            distance[current] = cost
+            remaining.discard(current)
+            if goals and not remaining:
+                break
+            entered = costs[current]
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[edge]
+                if owner[neighbor] != cluster or neighbor in distance:
+                    continue
+                step = entered * lengths[edge] if reverse else weights[edge]
+                if cost + step < best.get(neighbor, float('inf')):
+                    best[neighbor] = cost + step
+                    tree[neighbor] = current
+                    heapq.heappush(heap, (cost + step, neighbor))
+        return distance, tree
+
+    def breadth_first(self, source, cluster, goals=()):
+        # Unit costs: cells are final as soon as they are discovered
+        offsets, targets = self.graph.csr()
+        owner = self.owner
+        remaining = set(goals)
+        remaining.discard(source)
+        distance = {source: 0.0}
+        tree = {source: None}
+        queue = deque([source])
+        while queue and (remaining or not goals):
+            current = queue.popleft()
+            step = distance[current] + 1.0
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if owner[neighbor] == cluster and neighbor not in distance:
+                    distance[neighbor] = step
+                    tree[neighbor] = current
+                    remaining.discard(neighbor)
+                    queue.append(neighbor)
+        return distance, tree
+
+    def endpoint_search(self, cell, cluster, reverse):
+        key = (cell, reverse)
+        result = self.endpoints.get(key)
+        if result is None:
+            result = self.endpoints[key] = self.search(cell, cluster, self.entrances[cluster], reverse)
+            if len(self.endpoints) > ENDPOINT_CACHE_SIZE:
+                self.endpoints.popitem(last=False)
+        else:
+            self.endpoints.move_to_end(key)
+        return result
+
+    def find_path(self, start, goal, heuristic):
+        """Plan on the abstract graph and refine the chosen corridor.
+
+        ``heuristic(cell)`` must be admissible towards ``goal``. Returns
+        ``(expanded, path)``: the abstract nodes in expansion order and the
+        flat cell ids of the path, empty when the goal is unreachable.
+        """
+        cols = self.cols
+        source = start[0] * cols + start[1]
+        target = goal[0] * cols + goal[1]
+        if source == target:
+            return [source], [source]
+        start_cluster = self.owner[source]
+        goal_cluster = self.owner[target]
+        start_goals = self.entrances[start_cluster]
+        if goal_cluster == start_cluster:
+            start_goals = start_goals | {target}
+            start_distance, start_tree = self.search(source, start_cluster, start_goals)
+        else:
+            start_distance, start_tree = self.endpoint_search(source, start_cluster, False)
+        goal_distance, goal_tree = self.endpoint_search(target, goal_cluster, True)
+
+        def edges(node):
+            if node == source:
+                for other, cost in start_distance.items():
+                    if other in start_goals and other != source:
+                        yield other, cost, "start"
+            for other, cost in self.inter.get(node, {}).items():
+                yield other, cost, "inter"
+            for other, cost in self.intra.get(node, {}).items():
+                yield other, cost, "intra"
+            if node in goal_distance and node != target:
+                yield target, goal_distance[node], "goal"
+
+        g_score = {source: 0.0}
+        came_from = {source: None}
+        closed = set()
+        expanded = []
+        open_set = [(heuristic(source), source)]
+        while open_set:
+            current = heapq.heappop(open_set)[1]
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded.append(current)
+            if current == target:
+                break
+            g = g_score[current]
+            for neighbor, cost, kind in edges(current):
+                if g + cost < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = g + cost
+                    came_from[neighbor] = (current, kind)
+                    heapq.heappush(open_set, (g + cost + heuristic(neighbor), neighbor))
+        if target not in closed:
+            return expanded, []
+
+        # Refining the corridor to cells is this search's path reconstruction
+        with recorded_phase("path reconstruction"):
+            legs = []
+            node = target
+            while came_from[node] is not None:
+                previous, kind = came_from[node]
+                legs.append((previous, node, kind))
+                node = previous
+            path = [source]
+            for previous, node, kind in reversed(legs):
+                if kind == "inter":
+                    path.append(node)
+                elif kind == "intra":
+                    path += self.refine(previous, node)[1:]
+                elif kind == "start":
+                    path += _walk_back(start_tree, node)[1:]
+                else:  # "goal": follow successors down to the target
+                    cell = goal_tree[previous]
+                    while cell is not None:
+                        path.append(cell)
+                        cell = goal_tree[cell]
+        return expanded, path
+
+    def refine(self, u, v):
+        """Cell path between two entrances of one cluster, cached per cluster."""
+        cluster = self.owner[u]
+        paths = self.paths.setdefault(cluster, {})
+        path = paths.get((u, v))
+        if path is None:
+            _, tree = self.search(u, cluster, (v,))
+            path = paths[(u, v)] = _walk_back(tree, v)
+        return path
+
+
+def _walk_back(tree, cell):
+    path = []
+    while cell is not None:
+        path.append(cell)
+        cell = tree[cell]
+    path.reverse()
+    return path
+
+
+def cluster_hierarchy(grid, cluster_size=DEFAULT_CLUSTER_SIZE):
+    """Return the cached abstraction of ``grid``, updated for recent edits."""
+    model = as_grid_model(grid)
+    hierarchies = _hierarchy_cache.setdefault(model, {})
+    hierarchy = hierarchies.get(cluster_size)
+    if hierarchy is None:
+        hierarchy = hierarchies[cluster_size] = ClusterHierarchy(model, cluster_size)
+    else:
+        hierarchy.update(model)
+    return hierarchy
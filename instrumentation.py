@@ -0,0 +1,138 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# RunStats the searches started in this context report into, if any
+_recording = ContextVar("recording", default=None)
+
+# Phases timed by the GUI for one run, in the order they happen
+PHASES = ("grid extraction", "search", "path reconstruction", "animation setup")
+
+
+class SearchCounters:
+    """Counts a running search updates in place.
+
+    ``expanded`` counts cells taken off the frontier and processed,
+    ``generated`` cells put on it, ``max_frontier`` the largest frontier
+    seen. Searches on a raw ``heapq`` count their own heap operations; for
+    a priority_queue backend passed as ``queue`` its counts are read when
+    the counters are.
+    """
+
+    __slots__ = ("expanded", "generated", "max_frontier", "heap_pushes", "heap_pops", "stale_pops", "queue")
+
+    def __init__(self, queue=None):
+        self.expanded = 0
+        self.generated = 0
+        self.max_frontier = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.stale_pops = 0
+        self.queue = queue
+
+    def frontier(self, size):
+        if size > self.max_frontier:
+            self.max_frontier = size
+
+    def as_dict(self):
+        counts = {
+            "nodes_expanded": self.expanded,
+            "nodes_generated": self.generated,
+            "heap_pushes": self.heap_pushes,
+            "heap_pops": self.heap_pops,
+            "stale_pops": self.stale_pops,
+            "decrease_keys": 0,
+            "max_frontier": self.max_frontier,
+        }
+        if self.queue is not None:
+            queue = self.queue.counters()
+            counts["heap_pushes"] += queue["pushes"]
+            counts["heap_pops"] += queue["pops"]
+            counts["stale_pops"] += queue["stale_pops"]
+            counts["decrease_keys"] += queue["decreases"]
+            counts["max_frontier"] = max(counts["max_frontier"], queue["max_size"])
+        return counts
+
+
+@contextmanager
+def recorded_phase(name):
+    """Time the block into phase ``name`` of the RunStats being recorded,
+    if any; for work done inside a search, such as path reconstruction."""
+    stats = _recording.get()
+    if stats is None:
+        yield
+    else:
+        with stats.phase(name):
+            yield
+
+
+def search_counters(queue=None):
+    """Counters for a search that is starting, registered with the RunStats
+    being recorded, if any."""
+    counters = SearchCounters(queue)
+    stats = _recording.get()
+    if stats is not None:
+        stats.searches.append(counters)
+    return counters
+
+
+class RunStats:
+    """Counters and phase timings of one run.
+
+    Searches started inside ``recording()`` report their SearchCounters
+    here; they can be read from another thread while the search runs.
+    With ``trace_memory`` the run is also traced with ``tracemalloc`` for
+    its peak allocation, which slows it down noticeably.
+    """
+
+    def __init__(self, algorithm=None, trace_memory=False):
+        self.algorithm = algorithm
+        self.trace_memory = trace_memory
+        self.searches = []
+        self.phases = {}
+        self.peak_memory = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def recording(self):
+        token = _recording.set(self)
+        # Under an outer tracer (e.g. the benchmark) the peak is left to it
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            yield self
+        finally:
+            if tracing:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            _recording.reset(token)
+
+    def counters(self):
+        """Counts summed over the searches of the run (``max_frontier`` is
+        the largest of them) plus ``peak_memory`` in bytes."""
+        totals = SearchCounters().as_dict()
+        for search in list(self.searches):
+            for name, value in search.as_dict().items():
+                totals[name] = max(totals[name], value) if name == "max_frontier" else totals[name] + value
+        totals["peak_memory"] = self.peak_memory
+        return totals
+
+    def as_dict(self):
+        return {"algorithm": self.algorithm, "counters": self.counters(), "phases": dict(self.phases)}
+
+    def save_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
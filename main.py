@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QTranslator, QLocale
-from ui import MainWindow
 
 
 def main():
+    # ``main.py solve ...`` runs the headless solver, without PyQt5
+    if len(sys.argv) > 1 and sys.argv[1] == "solve":
+        from cli import main as solve
+        sys.exit(solve(sys.argv[2:]))
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTranslator, QLocale
+    from ui import MainWindow
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
 
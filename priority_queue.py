@@ -0,0 +1,241 @@
+import heapq
+
+import numpy as np
+
+# Backend names accepted by make_queue and the ``queue`` search parameter
+BINARY_HEAP = "binary"
+DARY_HEAP = "dary"
+BUCKET = "bucket"
+
+
+class _Counters:
+    """Operation counts shared by every backend.
+
+    ``pushes`` counts insertions, ``decreases`` priority updates of a cell
+    already queued, ``pops`` cells handed out and ``stale_pops`` outdated
+    entries thrown away on the way. ``max_size`` is the largest number of
+    queued cells.
+    """
+
+    def _reset_counters(self):
+        self.pushes = 0
+        self.decreases = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.max_size = 0
+
+    def counters(self):
+        return {
+            "pushes": self.pushes,
+            "decreases": self.decreases,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "max_size": self.max_size,
+        }
+
+
+class BinaryHeapQueue(_Counters):
+    """``heapq`` with lazy duplicates.
+
+    A lower priority for a queued cell pushes a second entry; entries that
+    no longer match the cell's current priority, or whose cell has already
+    been popped, are skipped when they reach the top.
+    """
+
+    def __init__(self, size):
+        self._heap = []
+        self._priority = memoryview(np.full(size, np.inf))
+        self._queued = bytearray(size)
+        self._length = 0
+        self._reset_counters()
+
+    def __len__(self):
+        return self._length
+
+    def push(self, node, priority):
+        """Queue ``node`` or lower its priority; returns False if it is
+        already queued at ``priority`` or lower."""
+        if self._queued[node]:
+            if priority >= self._priority[node]:
+                return False
+            self.decreases += 1
+        else:
+            self._queued[node] = 1
+            self._length += 1
+            self.pushes += 1
+            if self._length > self.max_size:
+                self.max_size = self._length
+        self._priority[node] = priority
+        heapq.heappush(self._heap, (priority, node))
+        return True
+
+    def pop(self):
+        """Remove and return ``(priority, node)`` with the lowest priority,
+        ties going to the lower cell id."""
+        heap = self._heap
+        while True:
+            priority, node = heapq.heappop(heap)
+            if self._queued[node] and priority == self._priority[node]:
+                break
+            self.stale_pops += 1
+        self._queued[node] = 0
+        self._length -= 1
+        self.pops += 1
+        return priority, node
+
+
+class DaryHeapQueue(_Counters):
+    """Indexed ``d``-ary heap with decrease-key.
+
+    Every queued cell has exactly one entry, so nothing goes stale; the
+    position of each cell in the heap is kept in a flat ``int32`` array.
+    Wider heaps are shallower, trading comparisons on pop for cheaper
+    decrease-keys.
+    """
+
+    def __init__(self, size, arity=4):
+        if arity < 2:
+            raise ValueError(f"Heap arity must be at least 2, got {arity}")
+        self.arity = arity
+        self._keys = []    # (priority, node) per heap slot
+        self._position = memoryview(np.full(size, -1, dtype=np.int32))
+        self._reset_counters()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def push(self, node, priority):
+        """Queue ``node`` or lower its priority; returns False if it is
+        already queued at ``priority`` or lower."""
+        position = self._position[node]
+        if position >= 0:
+            if priority >= self._keys[position][0]:
+                return False
+            self.decreases += 1
+        else:
+            position = len(self._keys)
+            self._keys.append(None)
+            self.pushes += 1
+            if len(self._keys) > self.max_size:
+                self.max_size = len(self._keys)
+        self._sift_up(position, (priority, node))
+        return True
+
+    def pop(self):
+        """Remove and return ``(priority, node)`` with the lowest priority,
+        ties going to the lower cell id."""
+        keys = self._keys
+        top = keys[0]
+        last = keys.pop()
+        self._position[top[1]] = -1
+        if keys:
+            self._sift_down(0, last)
+        self.pops += 1
+        return top
+
+    def _sift_up(self, position, key):
+        keys, where, arity = self._keys, self._position, self.arity
+        while position:
+            parent = (position - 1) // arity
+            if keys[parent] <= key:
+                break
+            keys[position] = keys[parent]
+            where[keys[position][1]] = position
+            position = parent
+        keys[position] = key
+        where[key[1]] = position
+
+    def _sift_down(self, position, key):
+        keys, where, arity = self._keys, self._position, self.arity
+        size = len(keys)
+        while True:
+            first = position * arity + 1
+            if first >= size:
+                break
+            child = min(range(first, min(first + arity, size)), key=keys.__getitem__)
+            if key <= keys[child]:
+                break
+            keys[position] = keys[child]
+            where[keys[position][1]] = position
+            position = child
+        keys[position] = key
+        where[key[1]] = position
+
+
+class BucketQueue(_Counters):
+    """Buckets of width ``width`` scanned from the lowest non-empty one.
+
+    Meant for small integer costs, where every entry in a bucket shares its
+    priority and pops are amortised O(1); other priorities stay correctly
+    ordered by a small heap inside each bucket. Lower priorities for queued
+    cells are lazy entries, skipped like in BinaryHeapQueue.
+    """
+
+    def __init__(self, size, width=1.0):
+        if width <= 0:
+            raise ValueError(f"Bucket width must be positive, got {width}")
+        self.width = width
+        self._buckets = []
+        self._cursor = 0
+        self._priority = memoryview(np.full(size, np.inf))
+        self._queued = bytearray(size)
+        self._length = 0
+        self._reset_counters()
+
+    def __len__(self):
+        return self._length
+
+    def push(self, node, priority):
+        """Queue ``node`` or lower its priority; returns False if it is
+        already queued at ``priority`` or lower."""
+        if priority < 0:
+            raise ValueError(f"Bucket queue priorities must be non-negative, got {priority}")
+        if self._queued[node]:
+            if priority >= self._priority[node]:
+                return False
+            self.decreases += 1
+        else:
+            self._queued[node] = 1
+            self._length += 1
+            self.pushes += 1
+            if self._length > self.max_size:
+                self.max_size = self._length
+        self._priority[node] = priority
+        index = int(priority / self.width)
+        buckets = self._buckets
+        if index >= len(buckets):
+            buckets.extend([] for _ in range(index + 1 - len(buckets)))
+        heapq.heappush(buckets[index], (priority, node))
+        if index < self._cursor:
+            self._cursor = index
+        return True
+
+    def pop(self):
+        """Remove and return ``(priority, node)`` with the lowest priority,
+        ties going to the lower cell id."""
+        buckets = self._buckets
+        while True:
+            while not buckets[self._cursor]:
+                self._cursor += 1
+            priority, node = heapq.heappop(buckets[self._cursor])
+            if self._queued[node] and priority == self._priority[node]:
+                break
+            self.stale_pops += 1
+        self._queued[node] = 0
+        self._length -= 1
+        self.pops += 1
+        return priority, node
+
+
+QUEUES = {
+    BINARY_HEAP: BinaryHeapQueue,
+    DARY_HEAP: DaryHeapQueue,
+    BUCKET: BucketQueue,
+}
+
+
+def make_queue(name, size):
+    """Build the backend called ``name`` from QUEUES for ``size`` cells."""
+    if name not in QUEUES:
+        raise ValueError(f"Unknown priority queue: {name}")
+    return QUEUES[name](size)
@@ -0,0 +1,129 @@
+import cProfile
+import itertools
+import os
+import pstats
+import re
+import time
+from contextlib import contextmanager
+
+# Set to a directory (or 1/true/yes for DEFAULT_DIRECTORY) to profile runs
+PROFILE_ENV = "PATHFINDING_PROFILE"
+DEFAULT_DIRECTORY = "profiles"
+DEFAULT_TOP = 20
+
+
+def profile_directory():
+    """Directory named by PATHFINDING_PROFILE, or None when profiling is off."""
+    value = os.environ.get(PROFILE_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on"):
+        return DEFAULT_DIRECTORY
+    return value
+
+
+def profile_filename(directory, label):
+    """New ``.pstats`` path in ``directory`` named after ``label``, the time
+    and the process, creating the directory if needed."""
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r"[^\w.-]+", "_", label).strip("_") or "run"
+    stem = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    filename = f"{stem}.pstats"
+    for attempt in itertools.count(2):
+        if not os.path.exists(filename):
+            return filename
+        filename = f"{stem}-{attempt}.pstats"
+
+
+class RunProfiler:
+    """cProfile session for one run that may span threads.
+
+    The thread calling ``enable()`` is profiled until ``disable()``; worker
+    threads add their own profile with ``thread_profile()``. Where cProfile
+    already follows every thread (Python 3.12+) a second profiler cannot be
+    enabled, and ``thread_profile()`` leaves the work to the first one.
+    """
+
+    def __init__(self, label="run"):
+        self.label = label
+        self.profiles = []
+        self._active = None
+
+    def enable(self):
+        self._active = cProfile.Profile()
+        self.profiles.append(self._active)
+        self._active.enable()
+
+    def disable(self):
+        if self._active is not None:
+            self._active.disable()
+            self._active = None
+
+    @contextmanager
+    def profiling(self):
+        self.enable()
+        try:
+            yield self
+        finally:
+            self.disable()
+
+    @contextmanager
+    def thread_profile(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None
+        else:
+            self.profiles.append(profile)
+        try:
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+
+    def stats(self):
+        """Merged ``pstats.Stats`` of every profile, or None before any."""
+        if not self.profiles:
+            return None
+        stats = pstats.Stats(self.profiles[0])
+        for profile in self.profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def save(self, directory=DEFAULT_DIRECTORY):
+        """Dump the merged stats to a new ``.pstats`` file in ``directory``
+        and return its path."""
+        filename = profile_filename(directory, self.label)
+        self.stats().dump_stats(filename)
+        return filename
+
+    def hotspots(self, limit=DEFAULT_TOP):
+        return hotspots(self.stats(), limit)
+
+
+def hotspots(stats, limit=DEFAULT_TOP):
+    """The ``limit`` functions with the most own time in ``stats``, as
+    ``(function, calls, own_seconds, cumulative_seconds)`` rows."""
+    if stats is None:
+        return []
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        location = f"{os.path.basename(filename)}:{line}({function})" if line else function
+        rows.append((location, calls, own, cumulative))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:limit]
+
+
+def format_hotspots(rows):
+    lines = [f"{'own s':>9} {'cum s':>9} {'calls':>10}  function"]
+    for location, calls, own, cumulative in rows:
+        lines.append(f"{own:9.4f} {cumulative:9.4f} {calls:>10}  {location}")
+    return "\n".join(lines)
+
+
+def merge_profiles(filenames, filename):
+    """Combine saved ``.pstats`` files into ``filename`` and return its stats."""
+    stats = pstats.Stats(*filenames)
+    stats.dump_stats(filename)
+    return stats
@@ -0,0 +1,248 @@
+import os
+import weakref
+
+import numpy as np
+
+from grid_model import as_grid_model
+
+# Reward shaping, same scheme for every cell
+REWARD_GOAL = 100
+REWARD_NEW_CELL = 2
+PENALTY_WALL = -20      # blocked move, the agent stays in place
+PENALTY_REVISIT = -20   # cell already visited in this episode
+SHAPING = 3             # getting closer to / further from the goal
+PENALTY_DEAD_END = -30
+PENALTY_OSCILLATION = -30
+OSCILLATION_WINDOW = 6  # recent states checked for short loops
+OSCILLATION_LIMIT = 2   # visits within the window before the penalty applies
+
+# Upper bound on the per-episode visited flags of one batch, in bytes; large
+# grids run fewer episodes side by side
+VISITED_BUDGET = 32 * 1024 * 1024
+
+# Cells within this many steps of an edit get their Q-values reset on a warm
+# start: moves into or out of the cell change, and so do the dead-end
+# penalties of moves into its neighbours
+INVALIDATION_RADIUS = 2
+
+_learned_tables = weakref.WeakKeyDictionary()
+
+
+class QLearningEngine:
+    """Tabular Q-learning over a GridGraph with the Q-table in a
+    ``(size, len(directions))`` float array.
+
+    Transitions and every reward term that only depends on the move itself
+    (walls, goal, distance shaping, dead ends) are precomputed per
+    ``(cell, action)``; only the revisit and oscillation terms are left to
+    the episodes. train() runs a batch of episodes side by side, one NumPy
+    step for all of them at a time.
+    """
+
+    def __init__(self, graph, goal):
+        self.graph = graph
+        self.target = graph.index(goal)
+        size, stride = graph.size, len(graph.directions)
+        self.q = np.zeros((size, stride), dtype=np.float64)
+
+        cells = np.arange(size)
+        moves = graph.moves.reshape(size, stride)
+        self.blocked = moves < 0
+        self.transitions = np.where(self.blocked, cells[:, None], moves)
+
+        # Shaping follows the Manhattan distance to the goal
+        goal_i, goal_j = goal
+        rows_of, cols_of = np.divmod(cells, graph.cols)
+        distance = np.abs(rows_of - goal_i) + np.abs(cols_of - goal_j)
+        delta = distance[self.transitions] - distance[:, None]
+
+        # A dead end has no way on other than back to where the agent came from
+        degree = np.diff(graph.offsets)
+        only_neighbor = np.full(size, -1, dtype=np.int64)
+        single = degree == 1
+        only_neighbor[single] = graph.targets[graph.offsets[:-1][single]]
+        next_degree = degree[self.transitions]
+        dead_end = (next_degree == 0) | ((next_degree == 1) & (only_neighbor[self.transitions] == cells[:, None]))
+
+        self.reaches_goal = self.transitions == self.target
+        reward = np.where(self.blocked, PENALTY_WALL, 0).astype(np.float64)
+        reward[self.reaches_goal] = REWARD_GOAL
+        reward -= SHAPING * np.sign(delta)
+        reward[dead_end & ~self.reaches_goal] += PENALTY_DEAD_END
+        self.static_reward = reward
+        # Moves whose reward depends on whether the next cell was visited
+        self.exploring = ~self.blocked & ~self.reaches_goal
+
+    def train(self, source, episodes, learning_rate, discount_factor, epsilon, min_epsilon,
+              epsilon_decay, max_steps, rng, parallel_episodes=64, clear_callback=None):
+        """Generator of per-step state arrays, one entry per running episode.
+
+        Episode ``k`` explores with ``epsilon * epsilon_decay ** k`` (floored
+        at ``min_epsilon``), as if the episodes had run one after another.
+        Episodes of a batch share the Q-table; when several update the same
+        entry in one step, one of the updates wins.
+        """
+        q, transitions, static_reward, exploring = self.q, self.transitions, self.static_reward, self.exploring
+        stride = q.shape[1]
+        if epsilon > min_epsilon:
+            schedule = np.maximum(min_epsilon, epsilon * epsilon_decay ** np.arange(episodes))
+        else:
+            schedule = np.full(episodes, epsilon)
+        parallel_episodes = max(1, min(parallel_episodes, VISITED_BUDGET // self.graph.size))
+        for first in range(0, episodes, parallel_episodes):
+            batch = min(parallel_episodes, episodes - first)
+            epsilons = schedule[first:first + batch]
+            states = np.full(batch, source, dtype=np.int64)
+            visited = np.zeros((batch, self.graph.size), dtype=bool)
+            lanes = np.arange(batch)
+            visited[lanes, states] = True
+            recent = np.full((batch, OSCILLATION_WINDOW), -1, dtype=np.int64)
+            running = lanes
+            for step in range(max_steps):
+                current = states[running]
+                explore = rng.random(len(running)) < epsilons[running]
+                actions = np.where(explore, rng.integers(stride, size=len(running)), q[current].argmax(axis=1))
+                following = transitions[current, actions]
+
+                reward = static_reward[current, actions]
+                fresh = exploring[current, actions]
+                seen = visited[running, following]
+                reward = reward + np.where(fresh, np.where(seen, PENALTY_REVISIT, REWARD_NEW_CELL), 0)
+                window = recent[running]
+                window[:, step % OSCILLATION_WINDOW] = current
+                recent[running] = window
+                looping = (window == current[:, None]).sum(axis=1) > OSCILLATION_LIMIT
+                reward = reward + np.where(looping, PENALTY_OSCILLATION, 0)
+
+                target_value = reward + discount_factor * q[following].max(axis=1)
+                q[current, actions] = (1 - learning_rate) * q[current, actions] + learning_rate * target_value
+
+                states[running] = following
+                visited[running, following] = True
+                yield following
+                running = running[following != self.target]
+                if not len(running):
+                    break
+            # Clear highlights every 1000 episodes
+            last = first + batch - 1
+            if clear_callback and last >= 1000 and last // 1000 != (first - 1) // 1000:
+                clear_callback()
+
+    def greedy_path(self, source):
+        """Follow the best action from ``source`` until the goal, a blocked
+        move or a revisit; returns flat ids, ending at the goal on success."""
+        path = [source]
+        visited = {source}
+        current = source
+        for _ in range(self.graph.size):
+            action = int(self.q[current].argmax())
+            if self.blocked[current, action]:
+                break
+            current = int(self.transitions[current, action])
+            if current in visited:
+                break
+            path.append(current)
+            visited.add(current)
+            if current == self.target:
+                break
+        return path
+
+
+class LearnedTable:
+    """A trained Q-table with the grid it was trained on, for warm starts."""
+
+    def __init__(self, q, goal, rows, cols, walls, costs, connectivity, corner_cutting):
+        self.q = q
+        self.goal = tuple(goal)
+        self.rows = rows
+        self.cols = cols
+        self.walls = walls
+        self.costs = costs
+        self.connectivity = connectivity
+        self.corner_cutting = corner_cutting
+
+    def matches(self, model, goal):
+        return ((self.rows, self.cols, self.connectivity, self.corner_cutting, self.goal)
+                == (model.rows, model.cols, model.connectivity, model.corner_cutting, tuple(goal)))
+
+    def changed_cells(self, model):
+        return np.flatnonzero((self.walls != model.walls) | (self.costs != model.costs))
+
+
+def remember_table(grid, engine, goal):
+    """Keep ``engine``'s Q-table as the warm start for later runs on ``grid``."""
+    model = as_grid_model(grid)
+    _learned_tables[model] = LearnedTable(
+        engine.q.copy(), goal, model.rows, model.cols, model.walls.copy(), model.costs.copy(),
+        model.connectivity, model.corner_cutting)
+
+
+def learned_table(grid):
+    return _learned_tables.get(as_grid_model(grid))
+
+
+def warm_start_engine(engine, grid, goal):
+    """Seed ``engine`` with the table learned on ``grid`` before, resetting
+    the rows around cells edited since and of the cells whose greedy route
+    leads into them. Returns False when no table fits."""
+    model = as_grid_model(grid)
+    table = _learned_tables.get(model)
+    if table is None or not table.matches(model, goal) or table.q.shape != engine.q.shape:
+        return False
+    engine.q[:] = table.q
+    changed = table.changed_cells(model)
+    if len(changed):
+        stale = np.zeros((model.rows, model.cols), dtype=bool)
+        stale.flat[changed] = True
+        # Dilate by INVALIDATION_RADIUS in both axes
+        for axis in (0, 1):
+            grown = stale.copy()
+            for shift in range(1, INVALIDATION_RADIUS + 1):
+                head = [slice(None)] * 2
+                tail = [slice(None)] * 2
+                head[axis], tail[axis] = slice(shift, None), slice(None, -shift)
+                grown[tuple(head)] |= stale[tuple(tail)]
+                grown[tuple(tail)] |= stale[tuple(head)]
+            stale = grown
+        stale = stale.reshape(-1)
+        # Cells whose greedy route runs into the edited area learned values
+        # that assumed the old layout; they are reset as well
+        following = engine.transitions[np.arange(engine.q.shape[0]), engine.q.argmax(axis=1)]
+        reaches = stale.copy()
+        jump = following
+        for _ in range(int(np.ceil(np.log2(max(2, len(stale))))) + 1):
+            reaches |= reaches[jump]
+            jump = jump[jump]
+        engine.q[reaches] = 0.0
+    return True
+
+
+def table_filename(config_filename):
+    """Where the Q-table of a saved configuration lives: next to it."""
+    return os.path.splitext(config_filename)[0] + ".qtable.npz"
+
+
+def save_table(grid, filename):
+    """Write the table learned on ``grid`` to ``filename``; returns False if
+    there is none. Q-values are stored as float32 and the walls bit-packed."""
+    table = learned_table(grid)
+    if table is None:
+        return False
+    with open(filename, "wb") as f:
+        np.savez_compressed(
+            f, q=table.q.astype(np.float32), goal=np.array(table.goal), shape=np.array([table.rows, table.cols]),
+            walls=np.packbits(table.walls), costs=table.costs, connectivity=np.array(table.connectivity),
+            corner_cutting=np.array(table.corner_cutting))
+    return True
+
+
+def load_table(grid, filename):
+    """Load a saved table as the warm start for ``grid``. Cells that differ
+    from the grid it was trained on are invalidated at the next warm start."""
+    model = as_grid_model(grid)
+    with np.load(filename) as data:
+        rows, cols = (int(n) for n in data["shape"])
+        walls = np.unpackbits(data["walls"], count=rows * cols)
+        _learned_tables[model] = LearnedTable(
+            data["q"].astype(np.float64), tuple(int(n) for n in data["goal"]), rows, cols, walls,
+            data["costs"], int(data["connectivity"]), str(data["corner_cutting"]))
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+
+from algorithms import ALGORITHM_EVENTS, PATH, VISIT, collect
+from grid_model import as_grid_model
+from trace_file import KIND_BITS, KIND_MASK, MappedTrace, TraceSteps, TraceWriter
+
+# Bumped when cached results stop matching what the algorithms produce, so
+# stale files in a disk tier are never read back
+CACHE_FORMAT = 1
+
+# Only reproducible with a fixed ``seed`` parameter
+STOCHASTIC = frozenset({"Random Walk", "Q-Learning"})
+# Steps depend on state kept from earlier runs, not just on the grid
+STATEFUL = frozenset({"D* Lite"})
+
+ENTRY_OVERHEAD = 128  # rough per-entry bookkeeping, in bytes
+
+_grid_digests = weakref.WeakKeyDictionary()
+
+
+def grid_digest(grid):
+    """Hash of everything about ``grid`` that a search can observe: size,
+    walls, costs and movement rules. Memoized per model version."""
+    model = as_grid_model(grid)
+    cached = _grid_digests.get(model)
+    if cached is not None and cached[0] == model.version:
+        return cached[1]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model.rows}x{model.cols}:{model.connectivity}:{model.corner_cutting}".encode())
+    digest.update(model.walls.tobytes())
+    digest.update(model.costs.tobytes())
+    value = digest.digest()
+    _grid_digests[model] = (model.version, value)
+    return value
+
+
+def cacheable(algorithm, params):
+    if algorithm in STATEFUL or params.get("warm_start"):
+        return False
+    return algorithm not in STOCHASTIC or params.get("seed") is not None
+
+
+def result_key(grid, start, goal, algorithm, params):
+    """Content address of one run; ``None`` for runs that cannot be replayed."""
+    if not cacheable(algorithm, params):
+        return None
+    digest = hashlib.blake2b(grid_digest(grid), digest_size=16)
+    parts = (CACHE_FORMAT, tuple(start), tuple(goal), algorithm, sorted(params.items()))
+    digest.update(repr(parts).encode())
+    return digest.hexdigest()
+
+
+class CachedResult:
+    """A stored run: trace-encoded records (see trace_file) decoded on access."""
+
+    def __init__(self, records, visits, rows, cols):
+        self.records = records
+        self.visits = visits
+        self.rows = rows
+        self.cols = cols
+
+    @property
+    def nbytes(self):
+        return self.records.itemsize * len(self.records) + ENTRY_OVERHEAD
+
+    @property
+    def steps(self):
+        """Read-only ``(i, j)`` sequence of the visited cells."""
+        return TraceSteps(memoryview(self.records), self.visits, self.cols)
+
+    @property
+    def path(self):
+        return [divmod(record >> KIND_BITS, self.cols) for record in self.records[self.visits:]]
+
+    @classmethod
+    def from_run(cls, steps, path, rows, cols):
+        records = array("i", (((i * cols + j) << KIND_BITS) | VISIT for i, j in steps))
+        records.extend(((i * cols + j) << KIND_BITS) | PATH for i, j in path)
+        return cls(records, len(steps), rows, cols)
+
+
+class ResultCache:
+    """LRU of finished runs, bounded by the bytes their records take.
+
+    With ``directory`` set, entries are also written there as trace files
+    and read back on a memory miss; that tier is pruned to ``disk_bytes``,
+    oldest files first.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None, disk_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        # The search worker stores results while the GUI thread looks them up
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self.load(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.remember(key, entry)
+        return entry
+
+    def put(self, key, steps, path, rows, cols):
+        """Store a run given as ``(i, j)`` lists, as collect() returns them."""
+        if key is None:
+            return None
+        entry = CachedResult.from_run(steps, path, rows, cols)
+        with self.lock:
+            self.remember(key, entry)
+        if self.directory:
+            self.save(key, entry)
+        return entry
+
+    def remember(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        if entry.nbytes > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def filename(self, key):
+        return os.path.join(self.directory, f"{key}.trace")
+
+    def save(self, key, entry):
+        filename = self.filename(key)
+        partial = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with TraceWriter(partial, entry.rows, entry.cols) as writer:
+            for record in entry.records:
+                writer.write(record & KIND_MASK, record >> KIND_BITS)
+        os.replace(partial, filename)
+        self.prune_disk()
+
+    def load(self, key):
+        if not self.directory:
+            return None
+        filename = self.filename(key)
+        try:
+            trace = MappedTrace(filename)
+        except (OSError, ValueError):
+            return None
+        try:
+            records = array("i")
+            records.frombytes(trace.records.tobytes())
+            entry = CachedResult(records, trace.visit_count, trace.rows, trace.cols)
+        finally:
+            trace.close()
+        try:
+            os.utime(filename)  # keeps recently used files out of prune_disk()
+        except OSError:
+            pass  # pruned by another process meanwhile
+        return entry
+
+    def prune_disk(self):
+        # Several processes may share the directory and prune it at once
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".trace"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+default_cache = ResultCache()
+
+
+def cached_search(algorithm, grid, start, goal, cache=None, cancel=None, **params):
+    """Run ``ALGORITHM_EVENTS[algorithm]`` through ``cache`` (the module's
+    default_cache if not given) and return ``(steps, path)`` lists.
+
+    Random Walk and Q-Learning are only cached when ``seed`` is given.
+    """
+    cache = default_cache if cache is None else cache
+    model = as_grid_model(grid)
+    key = result_key(model, start, goal, algorithm, params)
+    entry = cache.get(key)
+    if entry is not None:
+        return list(entry.steps), entry.path
+    events = ALGORITHM_EVENTS[algorithm](model, start, goal, **params)
+    steps, path = collect(events, model.cols, cancel)
+    cache.put(key, steps, path, model.rows, model.cols)
+    return steps, path
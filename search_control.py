@@ -0,0 +1,17 @@
+class SearchCancelled(Exception):
+    """Raised inside a search once its cancel token has been triggered."""
+
+
+class CancelToken:
+    """Flag shared between a running search and whoever may stop it."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise SearchCancelled()
+
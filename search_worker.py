@@ -0,0 +1,59 @@
+from contextlib import nullcontext
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from algorithms import collect
+from grid_model import as_grid_model
+from search_control import CancelToken, SearchCancelled
+
+
+class SearchWorker(QThread):
+    """Drains an algorithm's event generator off the GUI thread and streams
+    its steps back in chunks."""
+
+    steps_ready = pyqtSignal(object)        # list of (i, j) steps
+    search_finished = pyqtSignal(object)    # final path, or None
+    search_cancelled = pyqtSignal()
+    search_failed = pyqtSignal(str)
+
+    def __init__(self, events_function, grid, start, goal, params=None, chunk_size=256,
+                 cache=None, cache_key=None, stats=None, profiler=None, parent=None):
+        super().__init__(parent)
+        self.events_function = events_function
+        self.grid = grid
+        self.start_point = start
+        self.goal_point = goal
+        self.params = params or {}
+        self.chunk_size = chunk_size
+        # Finished runs are stored under ``cache_key`` when both are given,
+        # unless the grid was edited while the search ran
+        self.cache = cache
+        self.cache_key = cache_key
+        # instrumentation.RunStats the search reports into, if any
+        self.stats = stats
+        # profiling.RunProfiler that also profiles this thread, if any
+        self.profiler = profiler
+        self.version = as_grid_model(grid).version
+        self.token = CancelToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        with self.profiler.thread_profile() if self.profiler is not None else nullcontext():
+            self.search()
+
+    def search(self):
+        grid = as_grid_model(self.grid)
+        try:
+            events = self.events_function(grid, self.start_point, self.goal_point, **self.params)
+            steps, path = collect(events, grid.cols, self.token, self.steps_ready.emit, self.chunk_size, self.stats)
+            if self.cache is not None and self.cache_key is not None and grid.version == self.version:
+                self.cache.put(self.cache_key, steps, path, grid.rows, grid.cols)
+        except SearchCancelled:
+            self.search_cancelled.emit()
+            return
+        except Exception as exc:
+            self.search_failed.emit(str(exc))
+            return
+        self.search_finished.emit(path or None)
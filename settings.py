@@ -1,24 +1,31 @@
-from PyQt5.QtWidgets import QDialog, QFormLayout, QSpinBox, QComboBox, QPushButton
+from PyQt5.QtWidgets import QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, QComboBox, QPushButton, QCheckBox
+
+from algorithms import TIE_BREAKS
+from grid_model import CORNER_RULES
+from priority_queue import QUEUES
 
 class SettingsDialog(QDialog):
-    def __init__(self, parent=None):
+    """Grid, playback and algorithm settings, opened on the values in
+    ``settings`` (same keys as get_settings) so OK keeps what was not changed."""
+
+    def __init__(self, parent=None, settings=None):
         super().__init__(parent)
         self.setWindowTitle("Settings")
         layout = QFormLayout(self)
 
         # Динамическая настройка размеров сетки
         self.rows_spin = QSpinBox()
-        self.rows_spin.setRange(10, 100)
+        self.rows_spin.setRange(10, 2000)
         self.rows_spin.setValue(20)
         layout.addRow("Rows:", self.rows_spin)
 
         self.cols_spin = QSpinBox()
-        self.cols_spin.setRange(10, 100)
+        self.cols_spin.setRange(10, 2000)
         self.cols_spin.setValue(20)
         layout.addRow("Columns:", self.cols_spin)
 
         self.cell_size_spin = QSpinBox()
-        self.cell_size_spin.setRange(10, 50)
+        self.cell_size_spin.setRange(2, 50)
         self.cell_size_spin.setValue(30)
         layout.addRow("Cell Size:", self.cell_size_spin)
 
@@ -33,16 +40,128 @@ class SettingsDialog(QDialog):
         self.speed_spin.setValue(200)
         layout.addRow("Animation Speed (ms):", self.speed_spin)
 
+        # Пакетное воспроизведение: 0 — один шаг за интервал анимации
+        self.steps_per_second_spin = QSpinBox()
+        self.steps_per_second_spin.setRange(0, 1000000)
+        self.steps_per_second_spin.setSingleStep(1000)
+        self.steps_per_second_spin.setValue(0)
+        self.steps_per_second_spin.setSpecialValueText("Off")
+        layout.addRow("Playback (steps/s):", self.steps_per_second_spin)
+
+        # Модель движения: 4 или 8 соседей и правило срезания углов
+        self.connectivity_combo = QComboBox()
+        self.connectivity_combo.addItems(["4-connected", "8-connected"])
+        layout.addRow("Movement:", self.connectivity_combo)
+
+        self.corner_combo = QComboBox()
+        self.corner_combo.addItems(list(CORNER_RULES))
+        self.corner_combo.setToolTip("When a diagonal move may pass a wall corner")
+        layout.addRow("Corner Cutting:", self.corner_combo)
+
+        # Эвристика A*, Greedy и Beam Search; Auto выбирает по модели движения
+        self.heuristic_combo = QComboBox()
+        self.heuristic_combo.addItems(["Auto", "Manhattan", "Octile", "Euclidean"])
+        layout.addRow("Heuristic:", self.heuristic_combo)
+
+        # Порядок среди клеток с равным приоритетом в Greedy и Beam Search
+        self.tie_break_combo = QComboBox()
+        self.tie_break_combo.addItems([rule.upper() for rule in TIE_BREAKS])
+        self.tie_break_combo.setToolTip("FIFO expands the earliest pushed of equal cells first, LIFO the latest")
+        layout.addRow("Tie Breaking:", self.tie_break_combo)
+
+        # Ширина луча Beam Search
+        self.beam_width_spin = QSpinBox()
+        self.beam_width_spin.setRange(1, 100000)
+        self.beam_width_spin.setValue(3)
+        layout.addRow("Beam Width:", self.beam_width_spin)
+
+        # Очередь с приоритетом для A* и Dijkstra
+        self.queue_combo = QComboBox()
+        self.queue_combo.addItems(["Binary heap", "4-ary heap (decrease-key)", "Buckets (small integer costs)"])
+        layout.addRow("Priority Queue:", self.queue_combo)
+
+        # Пиковая память поиска через tracemalloc; заметно замедляет запуск
+        self.trace_memory_check = QCheckBox("Measure peak memory (slower)")
+        layout.addRow("Statistics:", self.trace_memory_check)
+
+        # Зерно для Random Walk и Q-Learning; с фиксированным зерном их
+        # результаты воспроизводимы и попадают в кэш
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setRange(-1, 2**31 - 1)
+        self.seed_spin.setValue(-1)
+        self.seed_spin.setSpecialValueText("Random")
+        layout.addRow("Random Seed:", self.seed_spin)
+
+        # Q-Learning продолжает обучение с прошлой Q-таблицы этой сетки
+        self.warm_start_check = QCheckBox("Reuse the learned Q-table")
+        self.warm_start_check.setToolTip("Retrain only around edited cells, for a few hundred episodes")
+        layout.addRow("Q-Learning:", self.warm_start_check)
+
+        # Стоимость, которую ставит режим рисования стоимостей
+        self.cost_brush_spin = QDoubleSpinBox()
+        self.cost_brush_spin.setRange(0.1, 100.0)
+        self.cost_brush_spin.setSingleStep(0.5)
+        self.cost_brush_spin.setValue(5.0)
+        layout.addRow("Cost Brush:", self.cost_brush_spin)
+
         # Кнопка подтверждения настроек
         btn = QPushButton("OK")
         btn.clicked.connect(self.accept)
         layout.addRow(btn)
 
+        if settings:
+            self.set_settings(settings)
+
+    def set_settings(self, settings):
+        """Show ``settings``; keys that are missing keep their defaults."""
+        spins = {
+            "rows": self.rows_spin,
+            "cols": self.cols_spin,
+            "cell_size": self.cell_size_spin,
+            "speed": self.speed_spin,
+            "steps_per_second": self.steps_per_second_spin,
+            "beam_width": self.beam_width_spin,
+            "cost_brush": self.cost_brush_spin,
+        }
+        for name, spin in spins.items():
+            if settings.get(name) is not None:
+                spin.setValue(settings[name])
+        if "theme" in settings:
+            self.theme_combo.setCurrentText(settings["theme"])
+        if "connectivity" in settings:
+            self.connectivity_combo.setCurrentIndex(1 if settings["connectivity"] == 8 else 0)
+        if "corner_cutting" in settings:
+            self.corner_combo.setCurrentText(settings["corner_cutting"])
+        if "heuristic" in settings:
+            heuristic = settings["heuristic"]
+            self.heuristic_combo.setCurrentText(heuristic.capitalize() if heuristic else "Auto")
+        if settings.get("tie_break") in TIE_BREAKS:
+            self.tie_break_combo.setCurrentIndex(TIE_BREAKS.index(settings["tie_break"]))
+        if settings.get("queue") in QUEUES:
+            self.queue_combo.setCurrentIndex(list(QUEUES).index(settings["queue"]))
+        if "seed" in settings:
+            self.seed_spin.setValue(-1 if settings["seed"] is None else settings["seed"])
+        if "warm_start" in settings:
+            self.warm_start_check.setChecked(bool(settings["warm_start"]))
+        if "trace_memory" in settings:
+            self.trace_memory_check.setChecked(bool(settings["trace_memory"]))
+
     def get_settings(self):
         return {
             "rows": self.rows_spin.value(),
             "cols": self.cols_spin.value(),
             "cell_size": self.cell_size_spin.value(),
             "theme": self.theme_combo.currentText(),
-            "speed": self.speed_spin.value()
+            "speed": self.speed_spin.value(),
+            "steps_per_second": self.steps_per_second_spin.value(),
+            "connectivity": 8 if self.connectivity_combo.currentIndex() else 4,
+            "corner_cutting": self.corner_combo.currentText(),
+            "heuristic": None if self.heuristic_combo.currentIndex() == 0 else self.heuristic_combo.currentText().lower(),
+            "seed": None if self.seed_spin.value() < 0 else self.seed_spin.value(),
+            "warm_start": self.warm_start_check.isChecked(),
+            "tie_break": TIE_BREAKS[self.tie_break_combo.currentIndex()],
+            "beam_width": self.beam_width_spin.value(),
+            "queue": list(QUEUES)[self.queue_combo.currentIndex()],
+            "trace_memory": self.trace_memory_check.isChecked(),
+            "cost_brush": self.cost_brush_spin.value()
         }
@@ -1,4 +1,18 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QFormLayout, QLabel
+
+from instrumentation import PHASES
+
+# Instrumentation counters shown under the summary, in display order
+COUNTER_LABELS = {
+    "nodes_expanded": "Nodes expanded",
+    "nodes_generated": "Nodes generated",
+    "heap_pushes": "Heap pushes",
+    "heap_pops": "Heap pops",
+    "stale_pops": "Stale pops",
+    "decrease_keys": "Decrease-keys",
+    "max_frontier": "Max frontier",
+    "peak_memory": "Peak memory",
+}
 
 class StatsPanel(QWidget):
     def __init__(self, parent=None):
@@ -6,9 +20,36 @@ class StatsPanel(QWidget):
         layout = QVBoxLayout(self)
         self.nodes_label = QLabel("Nodes visited: 0")
         self.path_label = QLabel("Path length: 0")
+        self.cost_label = QLabel("Path cost: 0")
         layout.addWidget(self.nodes_label)
         layout.addWidget(self.path_label)
+        layout.addWidget(self.cost_label)
+
+        # Счётчики и время фаз последнего запуска
+        details = QFormLayout()
+        self.detail_labels = {}
+        for key, title in list(COUNTER_LABELS.items()) + [(phase, phase.capitalize()) for phase in PHASES]:
+            self.detail_labels[key] = QLabel("-")
+            details.addRow(f"{title}:", self.detail_labels[key])
+        layout.addLayout(details)
 
     def update_stats(self, stats):
         self.nodes_label.setText(f"Nodes visited: {stats.get('Nodes visited', 0)}")
         self.path_label.setText(f"Path length: {stats.get('Path length', 0)}")
+        self.cost_label.setText(f"Path cost: {stats.get('Path cost', 'N/A')}")
+
+    def update_instrumentation(self, run_stats):
+        """Show the counters and phase times of an instrumentation.RunStats."""
+        counters = run_stats.counters()
+        for key in COUNTER_LABELS:
+            value = counters.get(key)
+            if value is None:
+                text = "-"
+            elif key == "peak_memory":
+                text = f"{value / 1024:.0f} KiB"
+            else:
+                text = str(value)
+            self.detail_labels[key].setText(text)
+        for phase in PHASES:
+            seconds = run_stats.phases.get(phase)
+            self.detail_labels[phase].setText("-" if seconds is None else f"{seconds * 1000:.1f} ms")
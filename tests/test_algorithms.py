@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from algorithms import ALGORITHMS, path_cost
+from grid_model import GridModel
+
+# Algorithms that return a shortest path on a 4-connected unit-cost grid
+OPTIMAL = ("BFS", "BFS (Frontier)", "A*", "IDA*", "Jump Point Search", "D* Lite", "Dijkstra", "IDDFS",
+           "Bidirectional BFS", "Bidirectional A*")
+# Searches that reach every reachable goal, though not always by the shortest path
+COMPLETE = OPTIMAL + ("DFS", "HPA*")
+# Learned or randomised searches, too slow or unreliable to compare here
+SKIPPED = ("Q-Learning", "Random Walk")
+
+
+def random_grid(seed, size=12, density=0.25):
+    rng = np.random.default_rng(seed)
+    model = GridModel(size, size, walls=(rng.random(size * size) < density).astype(np.uint8),
+                      start=(0, 0), end=(size - 1, size - 1))
+    model.walls[0] = model.walls[-1] = 0
+    return model
+
+
+def assert_valid_path(model, path):
+    assert path[0] == model.start and path[-1] == model.end
+    for (ai, aj), (bi, bj) in zip(path, path[1:]):
+        assert abs(ai - bi) + abs(aj - bj) == 1
+        assert not model.is_wall(bi, bj)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_algorithms_agree(seed):
+    model = random_grid(seed)
+    _, reference = ALGORITHMS["Dijkstra"](model, model.start, model.end)
+    for name, search in ALGORITHMS.items():
+        if name in SKIPPED:
+            continue
+        steps, path = search(model.copy(), model.start, model.end)
+        assert steps, name
+        if not reference:
+            assert not path, name
+            continue
+        if name in COMPLETE:
+            assert path, name
+        if path:
+            assert_valid_path(model, path)
+        if name in OPTIMAL:
+            assert math.isclose(path_cost(model, path), path_cost(model, reference)), name
+
+
+@pytest.mark.parametrize("name", [name for name in ALGORITHMS if name != "Q-Learning"])
+def test_start_is_goal(name):
+    model = GridModel(6, 6, start=(2, 3), end=(2, 3))
+    steps, path = ALGORITHMS[name](model, model.start, model.end)
+    assert steps
+    assert path == [model.start]
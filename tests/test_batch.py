@@ -0,0 +1,21 @@
+from batch import run_batch, solve
+from grid_model import GridModel
+from result_cache import ResultCache
+
+
+def test_solve_goes_through_the_cache():
+    model = GridModel(8, 8)
+    cache = ResultCache()
+    first = solve(model, (0, 0), (7, 7), "A*", cache=cache)
+    second = solve(model, (0, 0), (7, 7), "A*", cache=cache)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert second == first
+    solve(model, (0, 0), (7, 7), "Random Walk", cache=cache)
+    assert len(cache) == 1  # unseeded stochastic runs are not stored
+
+
+def test_run_batch_matches_solve():
+    model = GridModel(8, 8)
+    jobs = [((0, 0), (7, 7), "A*"), ((0, 0), (7, 7), "BFS"), ((7, 0), (0, 7), "Dijkstra")]
+    results = run_batch(model, jobs, max_workers=2)
+    assert [result["path"] for result in results] == [solve(model, *job)["path"] for job in jobs]
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from cli import solve_config, solve_configs
+
+
+def write_config(path, **overrides):
+    config = {"grid": [[0] * 15 for _ in range(6)], "start": [0, 0], "end": [5, 14]}
+    config.update(overrides)
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def test_solves_config(tmp_path):
+    result = solve_config(write_config(tmp_path / "open.json"), "A*")
+    assert "error" not in result
+    assert result["path"][0] == (0, 0) and result["path"][-1] == (5, 14)
+
+
+@pytest.mark.parametrize("endpoint, point", [("end", [0, 20]), ("end", [6, 0]), ("start", [-1, 3])])
+def test_endpoint_off_the_grid_is_an_error(tmp_path, endpoint, point):
+    filename = write_config(tmp_path / "bad.json", **{endpoint: point})
+    result = solve_config(filename, "A*")
+    assert "path" not in result
+    assert filename in result["error"] and endpoint.capitalize() in result["error"]
+
+
+def test_list_config_is_an_error(tmp_path):
+    filename = tmp_path / "list.json"
+    filename.write_text("[]")
+    result = solve_config(str(filename), "A*")
+    assert "JSON object" in result["error"]
+
+
+def test_truncated_qtable_fails_only_its_file(tmp_path):
+    broken = write_config(tmp_path / "broken.json")
+    (tmp_path / "broken.qtable.npz").write_bytes(b"PK\x03\x04\x14\x00\x00\x00")
+    good = write_config(tmp_path / "good.json")
+    results = solve_configs([broken, good], max_workers=2)
+    assert [result["config"] for result in results] == [broken, good]
+    assert "error" in results[0]
+    assert "error" not in results[1] and results[1]["path"]
+
+
+def test_cache_dir_replays_runs(tmp_path):
+    filename = write_config(tmp_path / "open.json")
+    cache_dir = str(tmp_path / "cache")
+    first = solve_configs([filename], ["A*", "D* Lite"], max_workers=1, cache_dir=cache_dir)
+    second = solve_configs([filename], ["A*", "D* Lite"], max_workers=2, cache_dir=cache_dir)
+    assert [result["cached"] for result in first] == [False, False]
+    # D* Lite depends on planner state, so it is never replayed
+    assert [result["cached"] for result in second] == [True, False]
+    assert second[0]["path"] == first[0]["path"]
+    assert second[0]["Nodes visited"] == first[0]["Nodes visited"]
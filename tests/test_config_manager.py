@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox
+
+from config_manager import load_config, read_config
+from q_learning import learned_table
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_corrupt_qtable_keeps_the_loaded_grid(app, tmp_path, monkeypatch):
+    widget = pytest.importorskip("grid_widget").GridWidget()
+    grid = [[0] * 20 for _ in range(20)]
+    grid[3][4] = 1
+    filename = tmp_path / "maze.json"
+    filename.write_text(json.dumps({"grid": grid, "start": [0, 0], "end": [19, 19]}))
+    (tmp_path / "maze.qtable.npz").write_bytes(b"PK\x03\x04\x14\x00\x00\x00")
+    warnings = []
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", lambda *args: (str(filename), ""))
+    monkeypatch.setattr(QMessageBox, "warning", lambda *args: warnings.append(args[2]))
+    load_config(widget)
+    assert len(warnings) == 1 and "Q-table" in warnings[0]
+    assert widget.model.is_wall(3, 4) and widget.end_point == (19, 19)
+    assert learned_table(widget.model) is None
+
+
+def test_read_config_without_qtable(tmp_path):
+    filename = tmp_path / "open.json"
+    filename.write_text(json.dumps({"grid": [[0] * 12] * 10, "start": [0, 0], "end": [9, 11]}))
+    model = read_config(str(filename))
+    assert (model.rows, model.cols, model.end) == (10, 12, (9, 11))
@@ -0,0 +1,58 @@
+import inspect
+import sys
+
+import pytest
+
+from algorithms import (TRANSPOSITION_LIMIT, VISIT, collect, depth_limited_events, dijkstra_search, ida_star_events,
+                        iddfs_events, path_cost)
+from grid_model import GridModel
+
+
+def corridor(length):
+    # One row, so the path is as deep as the grid is wide
+    return GridModel(1, length, start=(0, 0), end=(0, length - 1))
+
+
+@pytest.mark.parametrize("events_function", [iddfs_events, ida_star_events])
+def test_path_deeper_than_the_recursion_limit(events_function):
+    model = corridor(sys.getrecursionlimit() + 200)
+    _, path = collect(events_function(model, model.start, model.end), model.cols)
+    assert len(path) == model.cols
+    assert path[0] == model.start and path[-1] == model.end
+
+
+@pytest.mark.parametrize("events_function", [iddfs_events, ida_star_events, depth_limited_events])
+def test_transposition_table_defaults_to_the_limit(events_function):
+    assert inspect.signature(events_function).parameters["table_size"].default == TRANSPOSITION_LIMIT
+
+
+def innermost(generator):
+    while generator.gi_yieldfrom is not None:
+        generator = generator.gi_yieldfrom
+    return generator
+
+
+# Without pruning past the cap the passes grow exponentially, so the caps
+# are kept just small enough for each search to fill
+@pytest.mark.parametrize("events_function, size, table_size",
+                         [(iddfs_events, 7, 8), (iddfs_events, 7, 40), (ida_star_events, 12, 40),
+                          (ida_star_events, 12, 60)])
+def test_transposition_table_stays_within_its_cap(events_function, size, table_size):
+    # The wall sends the heuristic the wrong way, so IDA* also searches wide
+    model = GridModel(size, size, start=(0, 0), end=(size - 1, 0))
+    for j in range(size - 1):
+        model.set_wall(size // 2, j)
+    events = events_function(model, model.start, model.end, table_size=table_size)
+    largest = 0
+    path = []
+    for kind, node in events:
+        frame = innermost(events).gi_frame
+        table = frame.f_locals.get("table") if frame is not None else None
+        if table is not None:
+            largest = max(largest, len(table))
+        if kind != VISIT:
+            path.append(divmod(node, model.cols))
+    assert largest == table_size  # filled up to the cap, never past it
+    # Past the cap cells are searched without pruning, still optimally
+    _, expected = dijkstra_search(model, model.start, model.end)
+    assert path_cost(model, path) == path_cost(model, expected)
@@ -0,0 +1,45 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from algorithms import dijkstra_search, dstar_lite_search, path_cost
+from grid_model import CORNER_RULES, GridModel
+
+
+def random_free_cell(model, rng):
+    while True:
+        cell = (rng.randrange(model.rows), rng.randrange(model.cols))
+        if not model.is_wall(*cell) and cell != model.end:
+            return cell
+
+
+@pytest.mark.parametrize("weighted", (False, True))
+@pytest.mark.parametrize("connectivity, corner_cutting",
+                         [(4, CORNER_RULES[0])] + [(8, rule) for rule in CORNER_RULES])
+@pytest.mark.parametrize("seed", range(20))
+def test_replans_match_dijkstra(seed, connectivity, corner_cutting, weighted):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    rows, cols = 7, 23
+    costs = np_rng.choice([1.0, 1.0, 2.5, 4.0], rows * cols).astype(np.float32) if weighted else None
+    model = GridModel(rows, cols, walls=(np_rng.random(rows * cols) < 0.2).astype(np.uint8), costs=costs,
+                      connectivity=connectivity, corner_cutting=corner_cutting)
+    model.end = (3, cols - 1)
+    model.walls[model.index(*model.end)] = 0
+    model.start = random_free_cell(model, rng)
+    for _ in range(30):
+        for _ in range(rng.randrange(1, 4)):
+            cell = (rng.randrange(rows), rng.randrange(cols))
+            if cell not in (model.start, model.end):
+                model.toggle_wall(*cell)
+        if rng.random() < 0.5:
+            model.start = random_free_cell(model, rng)
+        _, path = dstar_lite_search(model, model.start, model.end)
+        _, expected = dijkstra_search(model, model.start, model.end)
+        if expected:
+            assert path and path[0] == model.start and path[-1] == model.end
+            assert math.isclose(path_cost(model, path), path_cost(model, expected))
+        else:
+            assert not path
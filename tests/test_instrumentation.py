@@ -0,0 +1,15 @@
+import pytest
+
+from algorithms import ALGORITHM_EVENTS, collect
+from grid_model import GridModel
+from instrumentation import RunStats
+
+
+@pytest.mark.parametrize("name", ["IDA*", "IDDFS", "Depth-Limited DFS"])
+def test_deepening_searches_count_expansions(name):
+    model = GridModel(10, 10, start=(0, 0), end=(9, 9))
+    stats = RunStats(name)
+    _, path = collect(ALGORITHM_EVENTS[name](model, model.start, model.end), model.cols, stats=stats)
+    assert path
+    counters = stats.counters()
+    assert 0 < counters["nodes_expanded"] <= counters["nodes_generated"] + 1
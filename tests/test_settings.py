@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from grid_model import CUT_ALWAYS
+from settings import SettingsDialog
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_unchanged_dialog_keeps_movement_model(app):
+    widget = pytest.importorskip("grid_widget").GridWidget()
+    widget.model.set_movement(8, CUT_ALWAYS)
+    widget.brush_cost = 2.5
+    dialog = SettingsDialog(settings=widget.current_settings())
+    dialog.accept()
+    widget.apply_settings(dialog.get_settings())
+    assert widget.model.connectivity == 8
+    assert widget.model.corner_cutting == CUT_ALWAYS
+    assert widget.brush_cost == 2.5
+
+
+def test_dialog_shows_algorithm_settings(app):
+    settings = {"heuristic": "octile", "tie_break": "lifo", "queue": "dary", "seed": 7,
+                "warm_start": True, "trace_memory": True, "beam_width": 12}
+    values = SettingsDialog(settings=settings).get_settings()
+    assert {name: values[name] for name in settings} == settings
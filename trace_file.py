@@ -0,0 +1,129 @@
+import mmap
+import struct
+from array import array
+
+from algorithms import PATH, VISIT
+
+# File layout: a 32-byte header followed by one int32 record per event,
+# ``(cell_id << 2) | kind`` with ``kind`` one of the algorithms event codes.
+MAGIC = b"PFTRACE1"
+HEADER = struct.Struct("<8sIIQQ")  # magic, rows, cols, records, leading visits
+KIND_BITS = 2
+KIND_MASK = (1 << KIND_BITS) - 1
+
+
+class TraceWriter:
+    """Streams step events to a compact binary trace file."""
+
+    def __init__(self, filename, rows, cols, kinds=(VISIT, PATH), buffer_size=65536):
+        self.file = open(filename, "wb")
+        self.rows = rows
+        self.cols = cols
+        self.kinds = frozenset(kinds)
+        self.buffer = array("i")
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.visits = 0
+        self.file.write(HEADER.pack(MAGIC, rows, cols, 0, 0))
+
+    def write(self, kind, node):
+        if kind not in self.kinds:
+            return
+        if kind == VISIT and self.visits == self.records:
+            self.visits += 1
+        self.buffer.append((node << KIND_BITS) | kind)
+        self.records += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_cell(self, kind, cell):
+        self.write(kind, cell[0] * self.cols + cell[1])
+
+    def record(self, events):
+        """Write every event from an ``*_events`` generator."""
+        for kind, node in events:
+            self.write(kind, node)
+
+    def flush(self):
+        self.buffer.tofile(self.file)
+        del self.buffer[:]
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, self.rows, self.cols, self.records, self.visits))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TraceSteps:
+    """Read-only ``(i, j)`` sequence over the visit records of a mapped trace."""
+
+    def __init__(self, records, count, cols):
+        self.records = records
+        self.count = count
+        self.cols = cols
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("trace step out of range")
+        return divmod(self.records[index] >> KIND_BITS, self.cols)
+
+
+class MappedTrace:
+    """Memory-mapped view of a trace file; records are decoded on access."""
+
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mmap) < HEADER.size or self.mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a trace file")
+        _, self.rows, self.cols, self.record_count, self.visit_count = HEADER.unpack_from(self.mmap)
+        self.records = memoryview(self.mmap)[HEADER.size:HEADER.size + 4 * self.record_count].cast("i")
+
+    def __len__(self):
+        return self.record_count
+
+    def event(self, index):
+        record = self.records[index]
+        return record & KIND_MASK, record >> KIND_BITS
+
+    @property
+    def steps(self):
+        """The leading run of visit records, i.e. the animated trace."""
+        return TraceSteps(self.records, self.visit_count, self.cols)
+
+    @property
+    def path(self):
+        return [divmod(record >> KIND_BITS, self.cols)
+                for record in self.records[self.visit_count:]
+                if record & KIND_MASK == PATH]
+
+    def close(self):
+        if getattr(self, "records", None) is not None:
+            self.records.release()
+            self.records = None
+        self.mmap.close()
+        self.file.close()
+
+
+def record_trace(filename, events, rows, cols):
+    """Write an ``*_events`` generator straight to ``filename``."""
+    with TraceWriter(filename, rows, cols) as writer:
+        writer.record(events)
+        return writer.visits
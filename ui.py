@@ -1,16 +1,24 @@
-from PyQt5.QtGui import QPalette, QColor
+import inspect
+import time
+
+from PyQt5.QtGui import QPalette, QColor, QFontDatabase
 from PyQt5.QtWidgets import (
     QMainWindow, QToolBar, QAction, QComboBox, QMessageBox, QDockWidget, QWidget, QVBoxLayout, QLabel, QPushButton,
-    QApplication
+    QApplication, QFileDialog, QPlainTextEdit
 )
 from PyQt5.QtCore import Qt
 from grid_widget import GridWidget
-from algorithms import ALGORITHMS
+from algorithms import ALGORITHMS, ALGORITHM_EVENTS, PATH, VISIT, path_cost
 from animation import Animator
+from search_worker import SearchWorker
 from settings import SettingsDialog
 from config_manager import save_config, load_config
 from stats_panel import StatsPanel
 from tutorial import TutorialDialog
+from trace_file import MappedTrace, TraceWriter
+from instrumentation import RunStats
+from profiling import DEFAULT_DIRECTORY, RunProfiler, format_hotspots, profile_directory
+from result_cache import ResultCache, result_key
 
 # Algorithm explanations
 ALGORITHM_EXPLANATIONS = {
@@ -26,7 +34,20 @@ ALGORITHM_EXPLANATIONS = {
     <h4>Time Complexity: O(V + E)</h4>
     <h4>Space Complexity: O(V)</h4>
     """,
-    
+
+    "BFS (Frontier)": """
+    <h3>Level-Synchronous BFS</h3>
+    <p>Expands the entire frontier of one depth level at a time using vectorized NumPy array operations.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Visits the same cells per depth level as BFS</li>
+        <li>Produces a full distance field as a by-product</li>
+        <li>Much faster than BFS on large open maps</li>
+    </ul>
+    <h4>Time Complexity: O(V + E)</h4>
+    <h4>Space Complexity: O(V)</h4>
+    """,
+
     "DFS": """
     <h3>Depth-First Search (DFS)</h3>
     <p>DFS explores as far as possible along each branch before backtracking.</p>
@@ -53,6 +74,58 @@ ALGORITHM_EXPLANATIONS = {
     <h4>Space Complexity: O(V)</h4>
     """,
     
+    "IDA*": """
+    <h3>Iterative Deepening A* (IDA*)</h3>
+    <p>Repeated depth-first passes bounded by f = g + h, each pass raising the bound to the smallest f cut off by the last.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Optimal with an admissible heuristic, like A*</li>
+        <li>Explicit stack: no recursion limit on large maps</li>
+        <li>A bounded transposition table prunes re-expansions</li>
+    </ul>
+    <h4>Time Complexity: O(b^d) worst case</h4>
+    <h4>Space Complexity: O(d) plus the transposition table</h4>
+    """,
+    
+    "Jump Point Search": """
+    <h3>Jump Point Search (JPS)</h3>
+    <p>A* that jumps along straight lines and only expands jump points where the shortest path may turn.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Prunes symmetric paths on uniform-cost grids</li>
+        <li>Finds the same optimal path length as A*</li>
+        <li>Expands far fewer nodes on large open maps</li>
+    </ul>
+    <h4>Time Complexity: O(E log V) worst case</h4>
+    <h4>Space Complexity: O(V)</h4>
+    """,
+    
+    "HPA*": """
+    <h3>Hierarchical Path-Finding A* (HPA*)</h3>
+    <p>Splits the grid into clusters, links their border entrances once, and answers queries on that small abstract graph before refining the chosen corridor to cells.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Abstraction is cached and reused across queries</li>
+        <li>Editing a cell rebuilds only the clusters it touches</li>
+        <li>Near-optimal: paths can be slightly longer than A*'s</li>
+    </ul>
+    <h4>Query Time: depends on the number of entrances, not on the grid size</h4>
+    <h4>Space Complexity: O(V) for the cached abstraction</h4>
+    """,
+    
+    "D* Lite": """
+    <h3>D* Lite</h3>
+    <p>Searches backward from the goal and keeps its state between runs. After walls or costs are edited, only the cells around the edits are re-expanded, so the steps shown on a rerun are just the repair work.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Optimal, like A*</li>
+        <li>Cheap replanning after small edits or a moved start</li>
+        <li>Moving the goal or changing the movement rules starts over</li>
+    </ul>
+    <h4>Replanning Time: proportional to the area affected by the edits</h4>
+    <h4>Space Complexity: O(V) for the kept search state</h4>
+    """,
+    
     "Dijkstra": """
     <h3>Dijkstra's Algorithm</h3>
     <p>Dijkstra's algorithm finds the shortest path between nodes in a graph.</p>
@@ -99,7 +172,7 @@ ALGORITHM_EXPLANATIONS = {
     <ul>
         <li>Guarantees optimal path in unweighted graphs</li>
         <li>Uses less memory than BFS</li>
-        <li>May visit same nodes multiple times</li>
+        <li>May visit same nodes multiple times, fewer with the transposition table</li>
     </ul>
     <h4>Time Complexity: O(b^d)</h4>
     <h4>Space Complexity: O(bd)</h4>
@@ -111,13 +184,26 @@ ALGORITHM_EXPLANATIONS = {
     <h4>Key Characteristics:</h4>
     <ul>
         <li>Faster than regular BFS</li>
-        <li>Guarantees shortest path</li>
+        <li>Guarantees shortest path (in steps), joined at the meeting cell</li>
         <li>Requires more memory than regular BFS</li>
     </ul>
     <h4>Time Complexity: O(b^(d/2))</h4>
     <h4>Space Complexity: O(b^(d/2))</h4>
     """,
     
+    "Bidirectional A*": """
+    <h3>Bidirectional A*</h3>
+    <p>Runs A* from the start and from the goal at once, both guided by the same averaged heuristic.</p>
+    <h4>Key Characteristics:</h4>
+    <ul>
+        <li>Guarantees optimal path if heuristic is admissible</li>
+        <li>Stops once no open cell can improve the best meeting path</li>
+        <li>Explores far less than A* on long corridors and mazes</li>
+    </ul>
+    <h4>Time Complexity: O(E log V)</h4>
+    <h4>Space Complexity: O(V)</h4>
+    """,
+    
     "Depth-Limited DFS": """
     <h3>Depth-Limited DFS</h3>
     <p>Depth-Limited DFS is DFS with a maximum depth limit.</p>
@@ -176,6 +262,17 @@ ALGORITHM_EXPLANATIONS = {
     """
 }
 
+# Seconds between live refreshes of the statistics while a search runs
+STATS_REFRESH_INTERVAL = 0.1
+
+# Settings dialog values passed on to the algorithms that accept them
+ALGORITHM_SETTINGS = ("heuristic", "seed", "warm_start", "tie_break", "beam_width", "queue")
+
+def algorithm_params(events_function, settings):
+    """Pick the settings that ``events_function`` takes as keyword arguments."""
+    accepted = inspect.signature(events_function).parameters
+    return {name: value for name, value in settings.items() if name in accepted and value is not None}
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -186,12 +283,26 @@ class MainWindow(QMainWindow):
         self.grid_widget = GridWidget()
         self.setCentralWidget(self.grid_widget)
 
+        # Профилирование запусков; включается из меню или PATHFINDING_PROFILE
+        self.profile_runs = profile_directory() is not None
+        self.profile_directory = profile_directory() or DEFAULT_DIRECTORY
+        self.profiler = None
+
         # Инициализация меню, тулбара и dock‑виджетов
         self.init_menu()
         self.init_toolbar()
         self.init_docks()
         self.statusBar().showMessage("Ready")
         self.animator = None
+        self.search_worker = None
+        self.trace = None
+        self.playback_settings = {"interval": 200, "steps_per_second": 0}
+        self.algorithm_settings = dict.fromkeys(ALGORITHM_SETTINGS)
+        self.result_cache = ResultCache()
+        self.instrumentation = None
+        self.trace_memory = False
+        self.stats_refreshed = 0.0
+        self.theme = "Light"
 
     def init_menu(self):
         menu_bar = self.menuBar()
@@ -199,7 +310,7 @@ class MainWindow(QMainWindow):
         file_menu = menu_bar.addMenu("&File")
         reset_action = QAction("Reset Grid", self)
         reset_action.setToolTip("Clear grid and reset start/end points")
-        reset_action.triggered.connect(self.grid_widget.reset_grid)
+        reset_action.triggered.connect(self.reset_grid)
         file_menu.addAction(reset_action)
 
         save_action = QAction("Save Configuration", self)
@@ -209,9 +320,24 @@ class MainWindow(QMainWindow):
 
         load_action = QAction("Load Configuration", self)
         load_action.setToolTip("Load grid configuration")
-        load_action.triggered.connect(lambda: load_config(self.grid_widget))
+        load_action.triggered.connect(self.load_configuration)
         file_menu.addAction(load_action)
 
+        save_trace_action = QAction("Save Trace", self)
+        save_trace_action.setToolTip("Save the current run as a binary step trace")
+        save_trace_action.triggered.connect(self.save_trace)
+        file_menu.addAction(save_trace_action)
+
+        replay_trace_action = QAction("Replay Trace", self)
+        replay_trace_action.setToolTip("Replay a saved step trace straight from disk")
+        replay_trace_action.triggered.connect(self.replay_trace)
+        file_menu.addAction(replay_trace_action)
+
+        export_stats_action = QAction("Export Statistics", self)
+        export_stats_action.setToolTip("Save the counters and timings of the last run as JSON")
+        export_stats_action.triggered.connect(self.export_statistics)
+        file_menu.addAction(export_stats_action)
+
         settings_action = QAction("Settings", self)
         settings_action.setToolTip("Open settings dialog")
         settings_action.triggered.connect(self.open_settings)
@@ -222,6 +348,14 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
 
+        tools_menu = menu_bar.addMenu("&Tools")
+        profile_action = QAction("Profile Runs", self)
+        profile_action.setToolTip(f"Record each run with cProfile and save it under {self.profile_directory}")
+        profile_action.setCheckable(True)
+        profile_action.setChecked(self.profile_runs)
+        profile_action.toggled.connect(self.set_profiling)
+        tools_menu.addAction(profile_action)
+
         help_menu = menu_bar.addMenu("&Help")
         tutorial_action = QAction("Tutorial", self)
         tutorial_action.setToolTip("Start interactive tutorial")
@@ -260,6 +394,11 @@ class MainWindow(QMainWindow):
         action_end.triggered.connect(lambda: self.set_mode("end"))
         toolbar.addAction(action_end)
 
+        action_cost = QAction("Paint Costs", self)
+        action_cost.setToolTip("Set cell traversal costs (cost brush in Settings)")
+        action_cost.triggered.connect(lambda: self.set_mode("cost"))
+        toolbar.addAction(action_cost)
+
         toolbar.addSeparator()
 
         # Запуск анимации и пошаговое управление
@@ -301,6 +440,16 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.explanation_label)
         self.explanation_dock.setWidget(explanation_widget)
         self.addDockWidget(0x2, self.explanation_dock)  # Qt.RightDockWidgetArea
+
+        # Самые затратные функции последнего профилированного запуска
+        self.profile_dock = QDockWidget("Profile Hotspots", self)
+        self.profile_view = QPlainTextEdit()
+        self.profile_view.setReadOnly(True)
+        self.profile_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.profile_view.setPlaceholderText("Enable Tools > Profile Runs and run an algorithm.")
+        self.profile_dock.setWidget(self.profile_view)
+        self.addDockWidget(0x8, self.profile_dock)  # Qt.BottomDockWidgetArea
+        self.profile_dock.setVisible(self.profile_runs)
         
         # Set initial explanation
         self.update_algorithm_explanation(self.algorithm_combo.currentText())
@@ -310,51 +459,224 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage(f"Mode set to: {mode}")
 
     def start_animation(self):
-        grid_data = self.grid_widget.get_grid_data()
         if self.grid_widget.start_point is None or self.grid_widget.end_point is None:
             QMessageBox.warning(self, "Warning", "Please set both start and end points!")
             return
 
-        # Clear any previous animation highlights
-        self.grid_widget.clear_animation_highlights()
-
         start = self.grid_widget.start_point
         end = self.grid_widget.end_point
         algo_name = self.algorithm_combo.currentText()
-        algo_function = ALGORITHMS.get(algo_name)
-        if not algo_function:
+        events_function = ALGORITHM_EVENTS.get(algo_name)
+        if not events_function:
             QMessageBox.critical(self, "Error", f"Algorithm {algo_name} not found!")
             return
 
-        result = None
-        if algo_name == "Q-Learning":
-            # Pass the clear_animation_highlights callback for Q-Learning
-            result = algo_function(grid_data, start, end, clear_callback=self.grid_widget.clear_animation_highlights)
-        else:
-            result = algo_function(grid_data, start, end)
-
-        if isinstance(result, tuple):
-            self.animation_steps, path = result
-        else:
-            self.animation_steps = result
-            path = None
+        # In profiling mode the whole run, up to the end of playback, is recorded
+        self.finish_profile()
+        if self.profile_runs:
+            self.profiler = RunProfiler(algo_name)
+            self.profiler.enable()
+        stats = RunStats(algo_name, self.trace_memory)
+        with stats.phase("grid extraction"):
+            grid_data = self.grid_widget.get_grid_data()
+
+        # Stop whatever is still running and clear previous highlights
+        self.reset_playback()
+        self.instrumentation = stats
+
+        params = algorithm_params(events_function, self.algorithm_settings)
+        cache_key = result_key(grid_data, start, end, algo_name, params)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            # Same grid, endpoints and parameters: replay the stored run
+            path = cached.path
+            self.animation_steps = cached.steps
+            with stats.phase("animation setup"):
+                self.animator = Animator(self.grid_widget, self.animation_steps, path=path,
+                                         on_finished=self.finish_profile, **self.playback_settings)
+                self.animator.start()
+            self.stats_panel.update_instrumentation(stats)
+            self.statusBar().showMessage(f"Replaying cached {algo_name} result...")
+            if self.animation_steps:
+                self.stats_panel.update_stats(self.run_stats(path))
+            else:
+                QMessageBox.information(self, "Result", "No path found!")
+            return
 
+        # The search runs in a worker thread and streams its steps to the
+        # animator, so the first frames draw while the search continues.
+        self.animation_steps = []
+        with stats.phase("animation setup"):
+            self.animator = Animator(self.grid_widget, self.animation_steps, complete=False,
+                                     on_finished=self.finish_profile, **self.playback_settings)
+        self.search_worker = SearchWorker(events_function, grid_data, start, end, params=params,
+                                          cache=self.result_cache, cache_key=cache_key, stats=stats,
+                                          profiler=self.profiler, parent=self)
+        self.search_worker.steps_ready.connect(self.animator.extend_steps)
+        self.search_worker.steps_ready.connect(self.refresh_instrumentation)
+        self.search_worker.search_finished.connect(self.on_search_finished)
+        self.search_worker.search_cancelled.connect(self.on_search_cancelled)
+        self.search_worker.search_failed.connect(self.on_search_failed)
+        self.search_worker.finished.connect(self.on_worker_finished)
+        with stats.phase("animation setup"):
+            self.animator.start()
+        # The worker reads the live model, so cells stay as they are until it exits
+        self.grid_widget.editable = False
+        self.search_worker.start()
+        self.statusBar().showMessage(f"Running {algo_name}... (grid editing resumes when the search ends)")
+
+    def on_worker_finished(self):
+        # Also reached by a superseded worker, after its successor started
+        if self.search_worker is None or not self.search_worker.isRunning():
+            self.grid_widget.editable = True
+
+    def on_search_finished(self, path):
+        if self.sender() is not self.search_worker:
+            return  # a superseded run
+        self.animator.finish(path)
+        self.stats_panel.update_instrumentation(self.instrumentation)
         if not self.animation_steps:
             QMessageBox.information(self, "Result", "No path found!")
             return
+        # Обновление статистики
+        self.stats_panel.update_stats(self.run_stats(path))
+
+    def refresh_instrumentation(self):
+        """Show the running search's counters, at most every STATS_REFRESH_INTERVAL."""
+        if self.sender() is not self.search_worker:
+            return  # a superseded run
+        now = time.perf_counter()
+        if now - self.stats_refreshed >= STATS_REFRESH_INTERVAL:
+            self.stats_refreshed = now
+            self.stats_panel.update_instrumentation(self.instrumentation)
+
+    def export_statistics(self):
+        if self.instrumentation is None:
+            QMessageBox.information(self, "Statistics", "Run an algorithm first.")
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Statistics", "", "JSON Files (*.json)")
+        if filename:
+            try:
+                self.instrumentation.save_json(filename)
+            except OSError as exc:
+                QMessageBox.critical(self, "Error", f"Cannot save statistics: {exc}")
+
+    def run_stats(self, path):
+        stats = {"Nodes visited": len(self.animation_steps), "Path length": len(path) if path else "N/A"}
+        if path:
+            stats["Path cost"] = round(path_cost(self.grid_widget.model, path), 3)
+        return stats
+
+    def on_search_cancelled(self):
+        if self.sender() is not self.search_worker:
+            return  # a superseded run
+        self.animator.finish()
+        self.statusBar().showMessage("Search cancelled.")
+
+    def on_search_failed(self, message):
+        if self.sender() is not self.search_worker:
+            return  # a superseded run
+        self.animator.finish()
+        QMessageBox.critical(self, "Error", f"Search failed: {message}")
+
+    def reset_playback(self):
+        """Stop the running search and animation and release any mapped trace."""
+        self.cancel_search()
+        if self.animator is not None:
+            self.animator.stop()
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+        self.grid_widget.clear_animation_highlights()
 
-        self.animator = Animator(self.grid_widget, self.animation_steps, path=path, interval=200)
+    def save_trace(self):
+        if self.animator is None or not self.animator.complete:
+            QMessageBox.information(self, "Trace", "Run an algorithm to completion first.")
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Trace", "", "Trace Files (*.trace)")
+        if filename:
+            model = self.grid_widget.model
+            with TraceWriter(filename, model.rows, model.cols) as writer:
+                for cell in self.animator.steps:
+                    writer.write_cell(VISIT, cell)
+                for cell in self.animator.path or ():
+                    writer.write_cell(PATH, cell)
+
+    def replay_trace(self):
+        """Replay a trace file through an mmap, without loading it into memory."""
+        filename, _ = QFileDialog.getOpenFileName(self, "Replay Trace", "", "Trace Files (*.trace)")
+        if not filename:
+            return
+        try:
+            trace = MappedTrace(filename)
+        except (OSError, ValueError) as exc:
+            QMessageBox.critical(self, "Error", f"Cannot open trace: {exc}")
+            return
+        model = self.grid_widget.model
+        if (trace.rows, trace.cols) != (model.rows, model.cols):
+            trace.close()
+            QMessageBox.warning(self, "Warning", f"Trace was recorded on a {trace.rows}x{trace.cols} grid!")
+            return
+
+        self.finish_profile()
+        self.reset_playback()
+        self.trace = trace
+        path = trace.path
+        self.animation_steps = trace.steps
+        self.animator = Animator(self.grid_widget, self.animation_steps, path=path, **self.playback_settings)
         self.animator.start()
-        self.statusBar().showMessage(f"Running {algo_name}...")
-        # Обновление статистики
-        path_length = len(path) if path else "N/A"
-        self.stats_panel.update_stats({"Nodes visited": len(self.animation_steps), "Path length": path_length})
+        self.statusBar().showMessage(f"Replaying {filename}...")
+        self.stats_panel.update_stats(self.run_stats(path))
+
+    def cancel_search(self):
+        """Ask a running search worker to stop and wait for it to exit."""
+        if self.search_worker is not None and self.search_worker.isRunning():
+            self.search_worker.cancel()
+            self.search_worker.wait()
+        self.grid_widget.editable = True
+
+    def reset_grid(self):
+        self.cancel_search()
+        self.grid_widget.reset_grid()
+
+    def load_configuration(self):
+        self.cancel_search()
+        load_config(self.grid_widget)
 
     def stop_animation(self):
-        """Stop the current animation and allow manual stepping."""
+        """Stop the current search and animation and allow manual stepping."""
+        if self.search_worker is not None and self.search_worker.isRunning():
+            self.search_worker.cancel()
         if self.animator is not None:
             self.animator.stop()
             self.statusBar().showMessage("Animation stopped. Use step controls to continue.")
+        self.finish_profile()
+
+    def set_profiling(self, enabled):
+        self.profile_runs = enabled
+        self.profile_dock.setVisible(enabled)
+
+    def finish_profile(self):
+        """Save the profile of the current run, if one is being recorded, and
+        list its hotspots."""
+        profiler, self.profiler = self.profiler, None
+        if profiler is None:
+            return
+        profiler.disable()
+        # The worker thread's profile is only complete once it has exited
+        self.cancel_search()
+        try:
+            filename = profiler.save(self.profile_directory)
+        except OSError as exc:
+            QMessageBox.critical(self, "Error", f"Cannot save profile: {exc}")
+            return
+        self.profile_view.setPlainText(format_hotspots(profiler.hotspots()))
+        self.statusBar().showMessage(f"Profile saved to {filename}")
+
+    def closeEvent(self, event):
+        self.finish_profile()
+        self.reset_playback()
+        super().closeEvent(event)
 
     def step_forward(self):
         """Execute one step forward in the animation."""
@@ -372,17 +694,38 @@ class MainWindow(QMainWindow):
             else:
                 self.statusBar().showMessage("At the beginning of animation")
 
+    def current_settings(self):
+        """Everything the settings dialog shows, as currently in effect."""
+        settings = self.grid_widget.current_settings()
+        settings.update(self.algorithm_settings)
+        settings.update({
+            "theme": self.theme,
+            "speed": self.playback_settings["interval"],
+            "steps_per_second": self.playback_settings["steps_per_second"],
+            "trace_memory": self.trace_memory,
+        })
+        return settings
+
     def open_settings(self):
-        dialog = SettingsDialog(self)
+        dialog = SettingsDialog(self, self.current_settings())
         if dialog.exec_():  # если пользователь нажал OK
             settings = dialog.get_settings()
-            # Применяем настройки к сетке
+            # Применяем настройки к сетке; идущий поиск читает её модель
+            self.cancel_search()
             self.grid_widget.apply_settings(settings)
             # Применяем выбранную тему
-            self.apply_theme(settings.get("theme", "Light"))
-            # Обновляем интервал анимации, если нужно (пример)
+            self.theme = settings.get("theme", "Light")
+            self.apply_theme(self.theme)
+            # Обновляем параметры воспроизведения для следующих запусков
+            self.playback_settings = {
+                "interval": settings.get("speed", 200),
+                "steps_per_second": settings.get("steps_per_second", 0),
+            }
+            self.algorithm_settings = {name: settings.get(name) for name in ALGORITHM_SETTINGS}
+            self.trace_memory = settings.get("trace_memory", False)
             if self.animator is not None:
-                self.animator.interval = settings.get("speed", 200)
+                self.animator.interval = self.playback_settings["interval"]
+                self.animator.steps_per_second = self.playback_settings["steps_per_second"]
 
     def apply_theme(self, theme):
         if theme == "Dark":